@@ -0,0 +1,189 @@
+"""
+Download of the dataset files that are not shipped with the package
+
+Test descriptions may include a "sources" section with the URL (and
+optionally the SHA-256 checksum) of each file of the dataset:
+
+    "sources": {
+        "argonaut_1.rnx": {
+            "url": "https://example.com/argonaut_1.rnx",
+            "sha256": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+        }
+    }
+
+Files are downloaded (in parallel, resuming partial transfers) into a
+content addressed mirror folder, which can be shared among several dataset
+folders (or users). Files are verified only when they are added to the
+mirror, and then linked into the dataset folder.
+"""
+import concurrent.futures
+import hashlib
+import os
+import shutil
+import tempfile
+
+import requests
+
+from roktools import logger
+
+from . import jason
+
+MIRROR_FOLDER = os.environ.get('GNSS_BENCHMARK_MIRROR',
+                               os.path.join(os.path.expanduser('~'), '.cache', 'gnss_benchmark', 'mirror'))
+
+SOURCES_KEY = 'sources'
+
+CHUNK_SIZE = 1024 * 1024
+
+TIMEOUT_S = 60
+
+PARTIAL_EXTENSION = '.part'
+
+
+class ChecksumError(ValueError):
+    pass
+
+
+# ------------------------------------------------------------------------------
+
+def fetch_datasets(descriptions: dict, description_files_root_path: str, mirror_folder: str = MIRROR_FOLDER,
+                   max_workers: int = 4) -> list:
+    """
+    Download the files of the datasets that are missing (and have a source
+    defined) and place them into the dataset folders
+
+    :returns: the list of files that have been placed into the dataset folders
+    """
+
+    # Group the missing files by source, so that files shared among datasets
+    # (e.g. base station files) are downloaded only once
+    pending = {}
+    for test_short_name, description in descriptions.items():
+
+        for filename, source in description.get(SOURCES_KEY, {}).items():
+
+            dst_file = os.path.join(description_files_root_path, test_short_name, filename)
+            if os.path.isfile(dst_file):
+                continue
+
+            key = source.get('sha256', None) or source['url']
+            pending.setdefault(key, (source, []))[1].append(dst_file)
+
+    out = []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        futures = {executor.submit(fetch, source['url'], mirror_folder, source.get('sha256', None)): dst_files
+                   for source, dst_files in pending.values()}
+
+        for future in concurrent.futures.as_completed(futures):
+            dst_files = futures[future]
+            try:
+                mirror_file = future.result()
+            except (requests.RequestException, ChecksumError, OSError) as e:
+                logger.warning(f'Could not fetch {dst_files}: {e}')
+                continue
+
+            for dst_file in dst_files:
+                try:
+                    link_file(mirror_file, dst_file)
+                except OSError as e:
+                    logger.warning(f'Could not place [ {mirror_file} ] into [ {dst_file} ]: {e}')
+                    continue
+                out.append(dst_file)
+
+    return sorted(out)
+
+# ------------------------------------------------------------------------------
+
+def fetch(url: str, mirror_folder: str = MIRROR_FOLDER, sha256: str = None) -> str:
+    """
+    Get a file into the mirror folder, downloading it if not already there
+
+    :returns: the name of the file in the mirror
+    """
+
+    if sha256:
+        mirror_file = get_mirror_filename(mirror_folder, sha256)
+        if os.path.isfile(mirror_file):
+            logger.debug(f'File [ {url} ] found in mirror [ {mirror_file} ]')
+            return mirror_file
+
+    partial_folder = os.path.join(mirror_folder, 'partial')
+    os.makedirs(partial_folder, exist_ok=True)
+
+    key = sha256 or hashlib.sha256(url.encode()).hexdigest()
+    partial_file = os.path.join(partial_folder, key + PARTIAL_EXTENSION)
+
+    download(url, partial_file)
+
+    checksum = jason.compute_file_hash(partial_file)
+    if sha256 and checksum != sha256.lower():
+        os.remove(partial_file)
+        raise ChecksumError(f'Checksum mismatch for [ {url} ]: expected {sha256}, got {checksum}')
+
+    mirror_file = get_mirror_filename(mirror_folder, checksum)
+    os.makedirs(os.path.dirname(mirror_file), exist_ok=True)
+    os.replace(partial_file, mirror_file)
+
+    logger.info(f'Fetched [ {url} ] into [ {mirror_file} ]')
+
+    return mirror_file
+
+# ------------------------------------------------------------------------------
+
+def download(url: str, filename: str):
+    """
+    Download an URL into a file. If the file already exists, it is assumed
+    to be a partial download and only the remaining bytes are requested
+    """
+
+    offset = os.path.getsize(filename) if os.path.isfile(filename) else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+    with requests.get(url, headers=headers, stream=True, timeout=TIMEOUT_S) as r:
+
+        if r.status_code == 416:
+            # Requested range not satisfiable: the file was already complete
+            return
+
+        r.raise_for_status()
+
+        mode = 'ab' if offset and r.status_code == 206 else 'wb'
+        logger.debug(f'Downloading [ {url} ] ({"resuming at byte " + str(offset) if mode == "ab" else "from start"})')
+
+        with open(filename, mode) as fh:
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                fh.write(chunk)
+
+# ------------------------------------------------------------------------------
+
+def get_mirror_filename(mirror_folder: str, sha256: str) -> str:
+
+    sha256 = sha256.lower()
+
+    return os.path.join(mirror_folder, 'sha256', sha256[:2], sha256)
+
+# ------------------------------------------------------------------------------
+
+def link_file(src_file: str, dst_file: str):
+    """
+    Place a file of the mirror into a dataset folder, using a hard link if
+    possible, a symbolic link otherwise and copying the file as last resort
+    """
+
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(dst_file), prefix='.tmp_')
+    os.close(fd)
+    os.remove(tmp_file)
+
+    error = None
+    for method in [os.link, os.symlink, shutil.copy]:
+        try:
+            method(os.path.abspath(src_file), tmp_file)
+            break
+        except OSError as e:
+            error = e
+    else:
+        raise error
+
+    os.replace(tmp_file, dst_file)
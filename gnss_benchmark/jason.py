@@ -1,5 +1,10 @@
 import datetime
+import gzip
+import hashlib
 import os
+import shutil
+import tempfile
+import threading
 import zipfile
 import numpy as np
 
@@ -10,6 +15,16 @@ import jason_gnss.commands
 
 ENGINE_NAME_STR = 'engine name'
 
+COMPRESSED_EXTENSIONS = ('.gz', '.zip', '.Z', '.bz2', '.tgz')
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+SECONDS_IN_WEEK = 604800
+
+GPS_EPOCH = datetime.datetime(1980, 1, 6)
+
+CSV_COLUMNS = ['GPSW', 'GPSSoW', 'latitudedeg', 'longitudedeg', 'heightm']
+
 
 # ------------------------------------------------------------------------------
 
@@ -111,11 +126,74 @@ class ProcessingSolutions(object):
  
 # ------------------------------------------------------------------------------
 
-class ProcessingEngine(object):
+class ArrayProcessingSolutions(ProcessingSolutions):
+    """
+    Read-only set of solutions backed by a numpy structured array (with the
+    same column names as the CSV output), such as a memory mapped file. The
+    array is not converted into PositionFix instances unless the solutions
+    are iterated
+    """
 
-    def __init__(self):
+    def __init__(self, data):
+
+        super().__init__()
+
+        self.data = data
+
+        weeks = self.data['GPSW']
+        tows = self.data['GPSSoW']
+
+        # Empty sets (e.g. trimmed to a time window without solutions) have 
+        # no reference epoch
+        self.t_0 = None
+        self.elapsed_times = np.zeros(0)
+        if len(self.data):
+            self.t_0 = roktools.time.weektow_to_datetime(tows[0], weeks[0])
+            self.elapsed_times = (weeks - weeks[0]) * SECONDS_IN_WEEK + (tows - tows[0])
+
+        self.longitudes = self.data['longitudedeg']
+        self.latitudes = self.data['latitudedeg']
+        self.altitudes = self.data['heightm']
+
+        self.up_to_date = True
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+
+        for i in range(len(self.data)):
+            epoch = self.t_0 + datetime.timedelta(seconds=float(self.elapsed_times[i]))
+            yield PositionFix(epoch, self.longitudes[i], self.latitudes[i], self.altitudes[i])
+
+    def __repr__(self):
+        return '\n'.join([str(p) for p in self])
+
+    def append(self, processing_solution):
+        raise TypeError('Unable to add solutions into an array backed set of solutions')
+
+    def _update(self):
         pass
 
+# ------------------------------------------------------------------------------
+
+class ProcessingEngine(object):
+
+    def __init__(self, compress_inputs: bool = False):
+        """
+        :params compress_inputs: (experimental) Upload the input files gzip
+                compressed. Only enable it if the Jason instance is known to
+                accept compressed inputs. Each distinct input is compressed
+                only once, but it is still uploaded for every configuration
+        """
+
+        self.compress_inputs = compress_inputs
+
+        self._checksums = {}
+        self._uploads = {}
+        self._uploads_lock = threading.Lock()
+        self._uploads_folder = None
+
     def version(self):
 
         out = jason_gnss.commands.api_status()
@@ -137,9 +215,11 @@ class ProcessingEngine(object):
         :returns: a ProcessingSolutions instance
         """
     
-        result_zip_file = jason_gnss.commands.process(rover_file=rover_file, strategy=strategy,
+        result_zip_file = jason_gnss.commands.process(rover_file=self._get_upload_file(rover_file), 
+                                                      strategy=strategy,
                                                       rover_dynamics=rover_dynamics,
-                                                      base_file=base_file, base_lonlathgt=base_lonlathgt,
+                                                      base_file=self._get_upload_file(base_file), 
+                                                      base_lonlathgt=base_lonlathgt,
                                                       label=label)
 
         out = None
@@ -152,6 +232,82 @@ class ProcessingEngine(object):
 
         return out
 
+    def _get_upload_file(self, filename: str) -> str:
+        """
+        Get the file to be uploaded for the given input file, compressing it
+        if it has not been already compressed for a previous run
+        """
+
+        if not self.compress_inputs or not filename or not os.path.isfile(filename) or \
+           filename.endswith(COMPRESSED_EXTENSIONS):
+            return filename
+
+        checksum = self._get_checksum(filename)
+        basename = os.path.basename(filename)
+
+        # The compressed file keeps the name of each input, so that inputs 
+        # with the same contents but different names are not uploaded with 
+        # another input's name
+        key = (checksum, basename)
+
+        with self._uploads_lock:
+
+            if key not in self._uploads:
+
+                if self._uploads_folder is None:
+                    self._uploads_folder = tempfile.TemporaryDirectory(prefix='gnss_benchmark_uploads_')
+
+                folder = os.path.join(self._uploads_folder.name, checksum)
+                os.makedirs(folder, exist_ok=True)
+                upload_file = os.path.join(folder, basename + '.gz')
+
+                compressed_files = [v for k, v in self._uploads.items() if k[0] == checksum]
+                if compressed_files:
+                    shutil.copy(compressed_files[0], upload_file)
+
+                else:
+                    roktools.logger.debug(f'Compressing [ {filename} ] into [ {upload_file} ]')
+                    with open(filename, 'rb') as fh_in, gzip.open(upload_file, 'wb') as fh_out:
+                        shutil.copyfileobj(fh_in, fh_out)
+
+                self._uploads[key] = upload_file
+
+            return self._uploads[key]
+
+    def _get_checksum(self, filename: str) -> str:
+        """
+        Checksum of an input file, only computed again if the file has 
+        changed (size or modification time) since the last call
+        """
+
+        stat = os.stat(filename)
+        key = (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+
+        with self._uploads_lock:
+            checksum = self._checksums.get(key, None)
+
+        if checksum is None:
+            checksum = compute_file_hash(filename)
+            with self._uploads_lock:
+                self._checksums[key] = checksum
+
+        return checksum
+
+# ------------------------------------------------------------------------------
+
+def compute_file_hash(filename: str) -> str:
+    """
+    Compute the SHA-256 digest of the contents of a file
+    """
+
+    sha256 = hashlib.sha256()
+
+    with open(filename, 'rb') as fh:
+        for block in iter(lambda: fh.read(HASH_BLOCK_SIZE), b''):
+            sha256.update(block)
+
+    return sha256.hexdigest()
+
 # ------------------------------------------------------------------------------
 
 def extract_solution_from_zip(zip_filename: str, strategy: str) -> ProcessingSolutions:
@@ -194,3 +350,20 @@ def convert_csv_output_to_processing_solutions(csv_fh) -> ProcessingSolutions:
         out.append(solution)
 
     return out
+
+# ------------------------------------------------------------------------------
+
+def convert_processing_solutions_to_csv(solutions: ProcessingSolutions, csv_fh):
+    """
+    Write the solutions with the same CSV format as the Jason output (so that
+    they can be read back with convert_csv_output_to_processing_solutions)
+    """
+
+    csv_fh.write(','.join(CSV_COLUMNS) + '\n')
+
+    for solution in solutions:
+        elapsed_time = (solution.epoch - GPS_EPOCH).total_seconds()
+        week = int(elapsed_time // SECONDS_IN_WEEK)
+        tow = elapsed_time - week * SECONDS_IN_WEEK
+        csv_fh.write('{},{:.6f},{:.10f},{:.10f},{:.5f}\n'.format(week, tow, solution.latitude_deg,
+                                                                  solution.longitude_deg, solution.altitude_m))
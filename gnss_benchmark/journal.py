@@ -0,0 +1,194 @@
+"""
+Run journal and duration history
+
+The run journal keeps, in a run folder, the solution of each configuration
+as soon as it is computed, so that an interrupted run can be resumed without
+processing again the configurations already finished.
+
+The duration history keeps how long each configuration took to process in
+previous runs, so that the longest configurations can be started first.
+"""
+import json
+import os
+import tempfile
+import threading
+
+from roktools import logger
+
+from . import jason
+
+JOURNAL_FILE = 'journal.jsonl'
+
+SOLUTIONS_FOLDER = 'solutions'
+
+DURATIONS_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'gnss_benchmark', 'durations.json')
+
+# Shared by all the duration histories of the process, since several of them
+# (e.g. one per job of the service) may update the same file
+_durations_lock = threading.Lock()
+
+
+# ------------------------------------------------------------------------------
+
+def get_key(engine_name: str, test_short_name: str, i_conf: int, configuration: dict,
+            quick_profile=None, engine=None) -> str:
+    """
+    Identifier of a configuration of a test run with a given engine (and,
+    if set, trimmed with the given quick profile). If the engine instance is
+    given, its identifier (see get_engine_id) is included as well, so that
+    engines run under the same name do not share solutions nor durations
+    """
+
+    if engine is not None:
+        engine_name = '{}@{}'.format(engine_name, get_engine_id(engine))
+
+    key = '{}/{}/{}_{}_{}'.format(engine_name, test_short_name, i_conf,
+                                  configuration['strategy'], configuration['rover_dynamics'])
+
+    if quick_profile is not None:
+        key += '_quick_{}_{}_{}'.format(quick_profile.start, quick_profile.duration, quick_profile.interval)
+
+    return key
+
+# ------------------------------------------------------------------------------
+
+def get_engine_id(engine) -> str:
+    """
+    Identifier of a processing engine: its class name, followed by its 'name'
+    attribute if defined (e.g. SubprocessProcessingEngine instances)
+    """
+
+    engine_id = type(engine).__name__
+
+    name = getattr(engine, 'name', None)
+    if isinstance(name, str) and name:
+        engine_id += '.' + name
+
+    return engine_id
+
+# ------------------------------------------------------------------------------
+
+class RunJournal(object):
+
+    def __init__(self, run_folder: str, description_files_root_path: str = None):
+        """
+        :params run_folder: Folder where the journal and the solutions are kept
+        :params description_files_root_path: Folder of the test cases. Entries
+                recorded with another dataset folder are ignored
+        """
+
+        self.run_folder = run_folder
+        self.journal_file = os.path.join(run_folder, JOURNAL_FILE)
+        self.dataset = os.path.abspath(description_files_root_path) if description_files_root_path else None
+        self.entries = {}
+
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(run_folder, SOLUTIONS_FOLDER), exist_ok=True)
+
+        if os.path.isfile(self.journal_file):
+            self._load()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load_solution(self, key: str) -> jason.ProcessingSolutions:
+
+        solution_file = os.path.join(self.run_folder, self.entries[key]['solution'])
+
+        return jason.convert_csv_output_to_processing_solutions(solution_file)
+
+    def record(self, key: str, solutions: jason.ProcessingSolutions, duration: float):
+        """
+        Durably record the solution of a configuration: the solution file is
+        written and flushed to disk before the journal entry that refers to it
+        """
+
+        solution_file = os.path.join(SOLUTIONS_FOLDER, key.replace('/', '__') + '.csv')
+        solution_path = os.path.join(self.run_folder, solution_file)
+
+        tmp_file = solution_path + '.tmp'
+        with open(tmp_file, 'w') as fh:
+            jason.convert_processing_solutions_to_csv(solutions, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_file, solution_path)
+
+        entry = {'key': key, 'solution': solution_file, 'duration': duration, 'dataset': self.dataset}
+
+        with self._lock:
+            with open(self.journal_file, 'a') as fh:
+                fh.write(json.dumps(entry) + '\n')
+                fh.flush()
+                os.fsync(fh.fileno())
+
+            self.entries[key] = entry
+
+    def _load(self):
+
+        with open(self.journal_file, 'r') as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Last line might be truncated if the run was killed
+                    logger.warning(f'Skipping invalid journal entry [ {line.strip()} ]')
+                    continue
+
+                if entry.get('dataset', None) != self.dataset:
+                    continue
+
+                if os.path.isfile(os.path.join(self.run_folder, entry['solution'])):
+                    self.entries[entry['key']] = entry
+
+        logger.info(f'Loaded {len(self.entries)} finished configurations from [ {self.journal_file} ]')
+
+# ------------------------------------------------------------------------------
+
+class DurationHistory(object):
+
+    def __init__(self, filename: str = DURATIONS_FILE):
+
+        self.filename = filename
+        self.durations = self._read()
+
+    def get(self, key: str) -> float:
+        return self.durations.get(key, None)
+
+    def update(self, key: str, duration: float):
+        """
+        Record the duration of a configuration. The file is read again before
+        writing it, so that the durations recorded meanwhile by other
+        histories are kept
+        """
+
+        with _durations_lock:
+            self.durations = self._read()
+            self.durations[key] = duration
+
+            folder = os.path.dirname(os.path.abspath(self.filename))
+            os.makedirs(folder, exist_ok=True)
+
+            fd, tmp_file = tempfile.mkstemp(dir=folder, prefix='.tmp_')
+            try:
+                with os.fdopen(fd, 'w') as fh:
+                    json.dump(self.durations, fh, indent=4, sort_keys=True)
+                os.replace(tmp_file, self.filename)
+            except BaseException:
+                os.remove(tmp_file)
+                raise
+
+    def _read(self) -> dict:
+
+        if not os.path.isfile(self.filename):
+            return {}
+
+        try:
+            with open(self.filename, 'r') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            logger.warning(f'Could not read the duration history [ {self.filename} ]')
+            return {}
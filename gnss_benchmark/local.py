@@ -0,0 +1,152 @@
+import os
+import subprocess
+import tempfile
+import threading
+
+import roktools.logger
+
+from . import jason
+
+OUTPUT_FILE_FIELD = 'output_file'
+
+
+# ------------------------------------------------------------------------------
+
+class SubprocessProcessingEngine(object):
+    """
+    Processing engine that runs a local command line GNSS solver
+
+    The command line is built from a list of argument templates, that are
+    formatted (using Python's str.format) with the parameters of each run:
+
+    - rover_file, base_file, broadcast_file, sp3_file: absolute path to inputs
+    - base_lon, base_lat, base_hgt: base station coordinates
+    - strategy, rover_dynamics, label: run parameters
+    - output_file: file where the solver must write its solution, using the
+      same CSV format as the Jason output (GPSW, GPSSoW, latitudedeg,
+      longitudedeg, heightm columns)
+
+    Arguments that refer to parameters not defined for a run (e.g. base_file
+    in an SPP run) are dropped from the command line, so that the same
+    templates can be shared among strategies (options that take a value,
+    such as '--base', should be defined in strategy_args). Example:
+
+    >>> engine = SubprocessProcessingEngine(
+    ...     ['rtk_solver', '-o', '{output_file}', '{rover_file}', '{base_file}'],
+    ...     strategy_args={'PPP': ['-p', '{sp3_file}']},
+    ...     dynamics_args={'static': ['--static']})
+    """
+
+    def __init__(self, command: list, strategy_args: dict = {}, dynamics_args: dict = {},
+                 name: str = 'local', max_workers: int = None, timeout: float = None,
+                 version_command: list = None):
+        """
+        :params command: list of argument templates of the solver command line
+        :params strategy_args: extra argument templates for each strategy
+        :params dynamics_args: extra argument templates for each rover dynamics
+        :params name: name of the engine, reported as part of the version
+        :params max_workers: maximum number of solver processes that can be
+                run at the same time (defaults to the number of CPU cores)
+        :params timeout: maximum time (in seconds) allowed for each solver run
+        :params version_command: (optional) command whose output identifies
+                the solver version
+        """
+
+        self.command = list(command)
+        self.strategy_args = strategy_args
+        self.dynamics_args = dynamics_args
+        self.name = name
+        self.max_workers = max_workers if max_workers else (os.cpu_count() or 1)
+        self.timeout = timeout
+        self.version_command = version_command
+
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+    def version(self):
+
+        out = {jason.ENGINE_NAME_STR: self.name, 'command': self.command[0]}
+
+        if self.version_command:
+            try:
+                p = subprocess.run(self.version_command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   timeout=self.timeout)
+                out.update({'version': p.stdout.decode('utf-8', errors='replace').strip()})
+            except (OSError, subprocess.TimeoutExpired) as e:
+                roktools.logger.warning(f'Could not get the solver version: {e}')
+                out.update({'version': 'unknown'})
+
+        return out
+
+    def run(self, rover_file: str, strategy: str, rover_dynamics: str, base_file: str = None,
+            base_lonlathgt: list = None, label: str = 'gnss-benchmark',
+            broadcast_file: str = None, sp3_file: str = None) -> jason.ProcessingSolutions:
+        """
+        Run the solver for the given inputs. This method can be called from
+        several threads, up to max_workers solver processes will run at the
+        same time.
+
+        :returns: a ProcessingSolutions instance (or None if the solver failed)
+        """
+
+        inputs = {
+            'rover_file': rover_file,
+            'base_file': base_file,
+            'broadcast_file': broadcast_file,
+            'sp3_file': sp3_file
+        }
+
+        fields = {k: os.path.abspath(v) for k, v in inputs.items() if v}
+        fields.update({'strategy': strategy, 'rover_dynamics': rover_dynamics, 'label': label})
+
+        if base_lonlathgt:
+            fields.update(dict(zip(['base_lon', 'base_lat', 'base_hgt'], base_lonlathgt)))
+
+        out = None
+
+        with tempfile.TemporaryDirectory() as workdir, self._slots:
+
+            fields[OUTPUT_FILE_FIELD] = os.path.join(workdir, '{}.csv'.format(strategy))
+
+            cmd = self.build_command(fields)
+            roktools.logger.debug('Running solver: {}'.format(' '.join(cmd)))
+
+            try:
+                p = subprocess.run(cmd, cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                roktools.logger.warning(f'Solver timed out for {rover_file} / {strategy} / {rover_dynamics}')
+                return None
+            except OSError as e:
+                # e.g. solver not found or not executable
+                roktools.logger.warning(f'Could not run solver for {rover_file} / {strategy} / {rover_dynamics}: {e}')
+                return None
+
+            roktools.logger.debug(f'solver stdout: {p.stdout}')
+            roktools.logger.debug(f'solver stderr: {p.stderr}')
+
+            if p.returncode != 0 or not os.path.isfile(fields[OUTPUT_FILE_FIELD]):
+                roktools.logger.warning(f'Could not run process for {rover_file} / {strategy} / {rover_dynamics}')
+
+            else:
+                out = jason.convert_csv_output_to_processing_solutions(fields[OUTPUT_FILE_FIELD])
+
+        return out
+
+    def build_command(self, fields: dict) -> list:
+        """
+        Format the argument templates for the given run parameters
+        """
+
+        templates = self.command + \
+                    self.strategy_args.get(fields['strategy'], []) + \
+                    self.dynamics_args.get(fields['rover_dynamics'], [])
+
+        cmd = []
+        for template in templates:
+            try:
+                cmd.append(template.format(**fields))
+            except KeyError as e:
+                roktools.logger.debug(f'Dropping argument [ {template} ], {e} not defined for this run')
+
+        return cmd
+
@@ -11,8 +11,11 @@ authentication should be defined:
 Usage:
     gnss_benchmark -h | --help
     gnss_benchmark --version
-    gnss_benchmark make_report [-d <path>] [-t <testname> ...] [-o path] [-f filename] [-r <name>] [-l <loglevel>] [-p <regexp>]
+    gnss_benchmark make_report [-d <path>] [-t <testname> ...] [-o path] [-f filename] [-r <name>] [-l <loglevel>] [-p <regexp>] [--run-dir <path> | --resume <path>] [--quick] [--quick-start <s>] [--quick-duration <s>] [--quick-interval <s>]
     gnss_benchmark list_tests [-d <path>] [-l <loglevel>] [-p <regexp>]
+    gnss_benchmark compile_datasets [-d <path>] [-l <loglevel>] [-p <regexp>]
+    gnss_benchmark serve [-d <path>] [-o path] [-l <loglevel>] [--host <host>] [--port <port>] [--workers <n>] [--max-queue <n>]
+    gnss_benchmark fetch_datasets [-d <path>] [-l <loglevel>] [-p <regexp>] [-m <path>]
 
 Options:
     -h --help           shows the help
@@ -30,11 +33,36 @@ Options:
     -d --dataset <path> path where the datasets will be located. If not defined, 
                         tests defined in the gnss benchmark package will be used
     -p --pattern <string> Filter tests according to the string given with this option
+    -m --mirror <path>  Folder where downloaded dataset files are stored. If not 
+                        defined, the GNSS_BENCHMARK_MIRROR environment variable
+                        or a folder in the user cache will be used
+    --run-dir <path>    Folder where the solution of each configuration is recorded
+                        as soon as it is computed, so that the run can be resumed
+                        if interrupted
+    --resume <path>     Resume an interrupted run, processing only the configurations
+                        not recorded in the given run folder
+    --host <host>       Address at which the service listens [default: 127.0.0.1]
+    --port <port>       Port at which the service listens [default: 8080]
+    --workers <n>       Maximum number of jobs run at the same time by the service [default: 1]
+    --max-queue <n>     Maximum number of jobs waiting in the service queue [default: 100]
+    --quick             Quick run: trim the rover and base files to a time window
+                        and decimate them before processing (trimmed files are
+                        cached for later runs)
+    --quick-start <s>     Start of the quick run time window, in seconds from the
+                          first epoch of the rover file [default: 0]
+    --quick-duration <s>  Length of the quick run time window, in seconds [default: 600]
+    --quick-interval <s>  Sampling interval of the quick run, in seconds [default: 1]
 
 Commands:
     make_report     Make the performance report using the test cases defined in the
                     GNSS benchmark repository
     list_tests      Outputs the list of datasets available for testing
+    serve           Run as a service that accepts benchmark jobs through a local
+                    HTTP API (see the service module for the API description)
+    fetch_datasets  Download the dataset files that are not shipped with the
+                    package (for the datasets that define their sources)
+    compile_datasets Write binary sidecars of the reference trajectories of the
+                    datasets, so that they are loaded faster in later runs
 """
 import os.path
 import pkg_resources
@@ -43,8 +71,12 @@ import sys
 import docopt
 from roktools import logger
 
+from . import fetcher
 from . import jason
+from . import journal
+from . import quick
 from . import report
+from . import service
 
 def main():
 
@@ -59,18 +91,52 @@ def main():
     dataset_path = args['--dataset'] if args['--dataset'] else report.DATASET_PATH
 
     if args['make_report']:
+        quick_profile = None
+        if args['--quick']:
+            quick_profile = quick.QuickProfile(start=float(args['--quick-start']),
+                                               duration=float(args['--quick-duration']),
+                                               interval=float(args['--quick-interval']))
+
+        run_folder = args['--run-dir']
+        if args['--resume']:
+            run_folder = args['--resume']
+            if not os.path.isfile(os.path.join(run_folder, journal.JOURNAL_FILE)):
+                logger.critical(f'No run to resume found in [ {run_folder} ]')
+                return 1
+
         jason_engine = jason.ProcessingEngine()
         report.make(jason_engine, 
                     description_files_root_path=dataset_path, 
                     output_folder=args['--output-folder'],
                     report_name=args['--filename'], 
-                    runby=args['--runby'], tests=args['--test'], pattern=args['--pattern'])
+                    runby=args['--runby'], tests=args['--test'], pattern=args['--pattern'],
+                    quick_profile=quick_profile, run_folder=run_folder)
 
     if args['list_tests']:
         test_list = report.get_test_list(description_files_root_path=dataset_path, pattern=args['--pattern'])
 
         sys.stdout.write('\n'.join(test_list) + '\n')
 
+    if args['serve']:
+        benchmark_service = service.BenchmarkService(jason.ProcessingEngine,
+                                                     description_files_root_path=dataset_path,
+                                                     output_folder=args['--output-folder'],
+                                                     workers=int(args['--workers']),
+                                                     max_queue=int(args['--max-queue']))
+        service.serve(benchmark_service, host=args['--host'], port=int(args['--port']))
+
+    if args['fetch_datasets']:
+        mirror_folder = args['--mirror'] if args['--mirror'] else fetcher.MIRROR_FOLDER
+        fetched_files = report.fetch_datasets(description_files_root_path=dataset_path, pattern=args['--pattern'],
+                                              mirror_folder=mirror_folder)
+
+        sys.stdout.write(''.join([f + '\n' for f in fetched_files]))
+
+    if args['compile_datasets']:
+        sidecar_files = report.compile_datasets(description_files_root_path=dataset_path, pattern=args['--pattern'])
+
+        sys.stdout.write(''.join([f + '\n' for f in sidecar_files]))
+
 
     return 0
 
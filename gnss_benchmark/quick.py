@@ -0,0 +1,376 @@
+"""
+Quick mode: trimming and decimation of the inputs of a test so that the
+benchmark can be run in a fraction of the time of the full run
+"""
+import datetime
+import hashlib
+import math
+import os
+import tempfile
+from typing import Tuple
+
+from roktools import logger
+
+from . import jason
+
+CACHE_FOLDER = os.path.join(os.path.expanduser('~'), '.cache', 'gnss_benchmark', 'quick')
+
+# Files to trim among the inputs of a test
+TRIMMED_INPUTS = ['rover_file', 'base_file']
+
+# Bump this value whenever the trimming output changes, to invalidate the cache
+CACHE_VERSION = 2
+
+# Tolerance used when comparing epochs (decimation and time window)
+EPOCH_TOLERANCE_S = 1.0e-3
+
+# Margin kept around the time window when trimming reference trajectories, so
+# that the interpolation at the edges of the window is not affected
+REFERENCE_MARGIN_S = 10.0
+
+RINEX_END_OF_HEADER = 'END OF HEADER'
+
+
+# ------------------------------------------------------------------------------
+
+class QuickProfile(object):
+
+    def __init__(self, start: float = 0, duration: float = 600, interval: float = 1.0,
+                 cache_folder: str = CACHE_FOLDER):
+        """
+        :params start: Start of the time window, in seconds from the first
+                epoch of the rover file
+        :params duration: Length of the time window, in seconds
+        :params interval: Sampling interval (in seconds) at which observations
+                will be decimated. Set to None or 0 to skip decimation
+        :params cache_folder: Folder where the trimmed files are stored, so
+                that later runs can reuse them
+        """
+
+        self.start = start
+        self.duration = duration
+        self.interval = interval
+        self.cache_folder = cache_folder
+
+    def __repr__(self):
+        return 'start {}s, duration {}s, interval {}s'.format(self.start, self.duration, self.interval)
+
+# ------------------------------------------------------------------------------
+
+def trim_inputs(inputs: dict, quick_profile: QuickProfile) -> Tuple[dict, Tuple[datetime.datetime, datetime.datetime]]:
+    """
+    Trim the rover and base files of a test to the time window of the quick
+    profile. The original files are left untouched.
+
+    :returns: the inputs with the rover and base files replaced by the trimmed 
+              ones, and the time window (start and end epochs). The window
+              is None if the rover file is not a RINEX observation file (in
+              this case no file is trimmed)
+    """
+
+    rover_file = inputs['rover_file']
+
+    first_epoch = get_first_epoch(rover_file)
+    if first_epoch is None:
+        logger.info(f'Rover file [ {rover_file} ] is not a RINEX observation file, skipping trimming')
+        return inputs, None
+
+    start = first_epoch + datetime.timedelta(seconds=quick_profile.start)
+    end = start + datetime.timedelta(seconds=quick_profile.duration)
+
+    out = dict(inputs)
+
+    for key in TRIMMED_INPUTS:
+        filename = inputs.get(key, None)
+        if not filename or not os.path.isfile(filename):
+            continue
+
+        trimmed_file = trim_rinex_file(filename, start, end, quick_profile.interval, quick_profile.cache_folder)
+        if trimmed_file:
+            out[key] = trimmed_file
+
+    return out, (start, end)
+
+# ------------------------------------------------------------------------------
+
+def trim_solutions(solutions: jason.ProcessingSolutions, start: datetime.datetime,
+                   end: datetime.datetime) -> jason.ProcessingSolutions:
+    """
+    Keep only the solutions within the time window (plus a small margin)
+    """
+
+    margin = datetime.timedelta(seconds=REFERENCE_MARGIN_S)
+
+    if isinstance(solutions, jason.ArrayProcessingSolutions):
+        if not len(solutions):
+            return solutions
+        t_start = (start - solutions.t_0).total_seconds() - REFERENCE_MARGIN_S
+        t_end = (end - solutions.t_0).total_seconds() + REFERENCE_MARGIN_S
+        mask = (solutions.elapsed_times >= t_start) & (solutions.elapsed_times <= t_end)
+        return jason.ArrayProcessingSolutions(solutions.data[mask])
+
+    out = jason.ProcessingSolutions()
+    for solution in solutions:
+        if start - margin <= solution.epoch <= end + margin:
+            out.append(solution)
+
+    return out
+
+# ------------------------------------------------------------------------------
+
+def trim_rinex_file(filename: str, start: datetime.datetime, end: datetime.datetime,
+                    interval: float = None, cache_folder: str = CACHE_FOLDER) -> str:
+    """
+    Trim a RINEX observation file to the given time window and decimate it
+    to the given interval. Trimmed files are cached (keyed by the contents of
+    the input file and the trimming parameters).
+
+    :returns: the name of the trimmed file, or None if the file is not a
+              RINEX observation file
+    """
+
+    if get_rinex_version(filename) is None:
+        return None
+
+    key = hashlib.sha256('{},{},{},{},{}'.format(jason.compute_file_hash(filename), start.isoformat(),
+                                                 end.isoformat(), interval, CACHE_VERSION).encode()).hexdigest()
+
+    # The original basename is kept, since engines may rely on it (e.g. to 
+    # guess the file format from the extension)
+    trimmed_file = os.path.join(cache_folder, key, os.path.basename(filename))
+
+    if os.path.isfile(trimmed_file):
+        logger.debug(f'Using cached trimmed file [ {trimmed_file} ] for [ {filename} ]')
+        return trimmed_file
+
+    os.makedirs(os.path.dirname(trimmed_file), exist_ok=True)
+
+    logger.debug(f'Trimming [ {filename} ] to [ {start} - {end} ], interval {interval}')
+
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(trimmed_file), prefix='.tmp_')
+    with open(filename, 'r', errors='replace') as fh_in, os.fdopen(fd, 'w') as fh_out:
+        _trim_rinex(fh_in, fh_out, start, end, interval)
+
+    os.replace(tmp_file, trimmed_file)
+
+    return trimmed_file
+
+# ------------------------------------------------------------------------------
+
+def get_rinex_version(filename: str) -> float:
+    """
+    Get the version of a RINEX observation file (None if the file is not
+    a RINEX observation file, e.g. Hatanaka compressed files or other formats)
+    """
+
+    try:
+        with open(filename, 'r', errors='replace') as fh:
+            line = fh.readline()
+    except (IOError, OSError):
+        return None
+
+    if 'RINEX VERSION / TYPE' not in line or line[20] != 'O':
+        return None
+
+    try:
+        return float(line[:9])
+    except ValueError:
+        return None
+
+# ------------------------------------------------------------------------------
+
+def get_first_epoch(filename: str) -> datetime.datetime:
+    """
+    Get the epoch of the first observation block of a RINEX observation file
+    """
+
+    version = get_rinex_version(filename)
+    if version is None:
+        return None
+
+    with open(filename, 'r', errors='replace') as fh:
+        _, n_obs = _read_header(fh)
+        for epoch, _ in _read_blocks(fh, version, n_obs):
+            if epoch is not None:
+                return epoch
+
+    return None
+
+# ------------------------------------------------------------------------------
+
+def _trim_rinex(fh_in, fh_out, start, end, interval):
+    """
+    Decimation is done over a common time grid (multiples of the interval
+    in GPS time), so that files trimmed separately (e.g. rover and base) keep
+    the same epochs. For each grid point within the window, the epoch closest
+    to it is kept
+    """
+
+    version = float(fh_in.readline()[:9])
+    fh_in.seek(0)
+
+    header, n_obs = _read_header(fh_in)
+
+    epochs = []
+    blocks = []
+
+    # Best candidate (epoch, block, grid index, distance) for the current grid point
+    candidate = None
+
+    tolerance = datetime.timedelta(seconds=EPOCH_TOLERANCE_S)
+
+    def flush_candidate():
+        if candidate is not None:
+            epochs.append(candidate[0])
+            blocks.append(candidate[1])
+
+    for epoch, block in _read_blocks(fh_in, version, n_obs):
+
+        if epoch is None:
+            # Special event records are kept if within the window
+            if candidate is not None or epochs:
+                flush_candidate()
+                candidate = None
+                blocks.append(block)
+            continue
+
+        if (epoch - start).total_seconds() < -EPOCH_TOLERANCE_S:
+            continue
+
+        if (epoch - end).total_seconds() > EPOCH_TOLERANCE_S:
+            break
+
+        if not interval:
+            epochs.append(epoch)
+            blocks.append(block)
+            continue
+
+        gps_seconds = (epoch - jason.GPS_EPOCH).total_seconds()
+        grid_index = round(gps_seconds / interval)
+        distance = abs(gps_seconds - grid_index * interval)
+
+        grid_epoch = jason.GPS_EPOCH + datetime.timedelta(seconds=grid_index * interval)
+        if not start - tolerance <= grid_epoch <= end + tolerance:
+            continue
+
+        if candidate is None or grid_index != candidate[2]:
+            flush_candidate()
+            candidate = (epoch, block, grid_index, distance)
+        elif distance < candidate[3]:
+            candidate = (epoch, block, grid_index, distance)
+
+    flush_candidate()
+
+    first_epoch = epochs[0] if epochs else None
+    last_epoch = epochs[-1] if epochs else None
+
+    for line in header:
+        label = line[60:].strip()
+        if last_epoch is not None and label == 'TIME OF FIRST OBS':
+            line = _format_time_of_obs(first_epoch, line)
+        elif last_epoch is not None and label == 'TIME OF LAST OBS':
+            line = _format_time_of_obs(last_epoch, line)
+        elif interval and label == 'INTERVAL':
+            line = '{:10.3f}'.format(max(interval, float(line[:10]))).ljust(60) + 'INTERVAL\n'
+        fh_out.write(line)
+
+    for block in blocks:
+        fh_out.writelines(block)
+
+# ------------------------------------------------------------------------------
+
+def _read_header(fh):
+    """
+    Read the header lines and, for RINEX 2, the number of observables (needed
+    to know the number of lines per satellite in the observation blocks)
+    """
+
+    header = []
+    n_obs = None
+
+    for line in fh:
+        header.append(line)
+
+        label = line[60:].strip()
+        if label == '# / TYPES OF OBSERV' and line[:6].strip():
+            n_obs = int(line[:6])
+        elif label == RINEX_END_OF_HEADER:
+            break
+
+    return header, n_obs
+
+# ------------------------------------------------------------------------------
+
+def _read_blocks(fh, version, n_obs):
+    """
+    Iterate over the epoch blocks of the file, yielding the epoch (None for
+    special event records) and the lines of the block
+    """
+
+    if version >= 3:
+        yield from _read_blocks_v3(fh)
+    else:
+        yield from _read_blocks_v2(fh, n_obs)
+
+# ------------------------------------------------------------------------------
+
+def _read_blocks_v3(fh):
+
+    for line in fh:
+        if not line.startswith('>'):
+            continue
+
+        flag = int(line[31:32] or '0')
+        n_records = int(line[32:35])
+        block = [line] + [fh.readline() for _ in range(n_records)]
+
+        epoch = None
+        if flag <= 1:
+            fields = line[1:29].split()
+            epoch = _build_epoch(*fields)
+
+        yield epoch, block
+
+# ------------------------------------------------------------------------------
+
+def _read_blocks_v2(fh, n_obs):
+
+    lines_per_sat = int(math.ceil(n_obs / 5.0))
+
+    for line in fh:
+        if not line.strip():
+            continue
+
+        flag = int(line[28:29] or '0')
+        n_records = int(line[29:32])
+
+        if flag > 1:
+            block = [line] + [fh.readline() for _ in range(n_records)]
+            yield None, block
+            continue
+
+        n_sat_lines = int(math.ceil(n_records / 12.0))
+        block = [line] + [fh.readline() for _ in range(n_sat_lines - 1)]
+        block += [fh.readline() for _ in range(n_records * lines_per_sat)]
+
+        year, month, day, hour, minute, second = line[:26].split()
+        year = int(year)
+        year += 2000 if year < 80 else 1900
+
+        yield _build_epoch(year, month, day, hour, minute, second), block
+
+# ------------------------------------------------------------------------------
+
+def _build_epoch(year, month, day, hour, minute, second):
+
+    epoch = datetime.datetime(int(year), int(month), int(day), int(hour), int(minute))
+    return epoch + datetime.timedelta(seconds=float(second))
+
+# ------------------------------------------------------------------------------
+
+def _format_time_of_obs(epoch, line):
+
+    second = epoch.second + epoch.microsecond / 1.0e6
+    out = '{:6d}{:6d}{:6d}{:6d}{:6d}{:13.7f}'.format(epoch.year, epoch.month, epoch.day,
+                                                     epoch.hour, epoch.minute, second)
+    return out + line[43:]
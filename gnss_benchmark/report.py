@@ -1,13 +1,17 @@
+import collections
+import concurrent.futures
 import datetime
 import glob
 import jinja2
 import json
 import os
-import matplotlib.pyplot as plt
+import matplotlib.figure
 import numpy as np
 import shutil
 import subprocess
 import tempfile
+import threading
+import time
 import pkg_resources
 import re
 from typing import Tuple
@@ -21,7 +25,11 @@ transformer_xyz_lla = pyproj.Transformer.from_proj(ecef, lla)
 from roktools import geodetic, logger
 import roktools.time
 
+from . import fetcher
 from . import jason
+from . import journal
+from . import quick
+from . import trajectory
 
 TEMPLATES_PATH = pkg_resources.resource_filename('gnss_benchmark', 'templates')
 DATASET_PATH = pkg_resources.resource_filename('gnss_benchmark', 'datasets')
@@ -30,16 +38,41 @@ FIGURE_FORMAT = 'png'
 
 INVALID_RMS_VALUE = -9999
 
+DEFAULT_ENGINE_NAME = 'engine'
+
+ENGINE_COLORS = ['#0072bd', '#d95319', '#77ac30', '#7e2f8e', '#edb120', '#4dbeee']
+
+# pyproj transformers cannot be shared among threads, each thread builds 
+# (once) its own transformers. The module level transformers above are kept
+# for existing callers, but should only be used from a single thread
+_thread_local = threading.local()
+
+def get_transformers():
+    """
+    Get the (LLA to ECEF, ECEF to LLA) transformers of the calling thread
+    """
+
+    if not hasattr(_thread_local, 'transformer_lla_xyz'):
+        _thread_local.transformer_lla_xyz = pyproj.Transformer.from_proj(lla, ecef)
+        _thread_local.transformer_xyz_lla = pyproj.Transformer.from_proj(ecef, lla)
+
+    return _thread_local.transformer_lla_xyz, _thread_local.transformer_xyz_lla
+
 def make(processing_engine, description_files_root_path=DATASET_PATH, 
             output_folder='.', report_name='report.pdf', results=None, 
-            runby='info@rokubun.cat', tests=[], pattern=None):
+            runby='info@rokubun.cat', tests=[], pattern=None, quick_profile=None,
+            run_folder=None, durations_file=journal.DURATIONS_FILE, descriptions=None,
+            references_cache=None):
     """
-    Make a report using the provided processing engine
+    Make a report using the provided processing engine(s)
 
     :params processing_engine: a method that accepts parameters and returns an
                                 array of time tagged solutions. An example 
                                 of such method can be seen in the example
-                                provided for Rokubun Jason GNSS cloud service
+                                provided for Rokubun Jason GNSS cloud service.
+                                A dictionary of engines indexed by name can be
+                                given instead to compare several engines over
+                                the same datasets.
     :params description_files_root_path: Folder where the test cases are located.
             By default, the test cases provided in the package will be used, 
             but the user can provide their own, following the same structure
@@ -49,24 +82,77 @@ def make(processing_engine, description_files_root_path=DATASET_PATH,
             The extension will define the report format (e.g. 'md', 'pdf', 'odt',
             'docx', ...)
     :params results: Skip the processing by defining a set of results already
-            provided by the processing engine. This is intended for debugging
-            purposes.
+            provided by the processing engines (indexed by engine name). This
+            is intended for debugging purposes.
     :params runby: Identifier (name, e-mail, ...) of the responsible that run
             the tool.
+    :params quick_profile: (optional) quick.QuickProfile instance. If set, 
+            the rover and base files (and the reference trajectories) are 
+            trimmed to a time window and decimated before being processed.
+    :params run_folder: (optional) Folder where the solution of each 
+            configuration is recorded as soon as it is computed. If the folder
+            contains a previous (e.g. interrupted) run, only the configurations
+            not yet recorded will be processed.
+    :params durations_file: File with the processing duration of each 
+            configuration in previous runs, used to start the longest
+            configurations first. Set to None to disable it.
+    :params descriptions: (optional) Test descriptions already loaded (see
+            get_test_descriptions), so that the dataset folder is not scanned
+    :params references_cache: (optional) ReferencesCache where loaded reference
+            trajectories are kept, to be reused in later calls
     """
 
-    descriptions = _fetch_test_descriptions(description_files_root_path, pattern)
+    processing_engines = _get_named_engines(processing_engine)
+
+    if descriptions is None:
+        descriptions = _fetch_test_descriptions(description_files_root_path, pattern)
+    elif pattern is not None:
+        descriptions = {k:v for k,v in descriptions.items() 
+                        if _match_pattern(_get_description_file(description_files_root_path, k), pattern)}
 
     if len(tests):
         descriptions = {k:v for k,v in descriptions.items() if k in tests}
 
     if not results:
-        results = _run_processing_engine(descriptions, description_files_root_path, processing_engine)
+        results = _run_processing_engines(descriptions, description_files_root_path, processing_engines,
+                                          quick_profile=quick_profile, run_folder=run_folder,
+                                          durations_file=durations_file, references_cache=references_cache)
     
-    report_filename = _render_report(descriptions, results, output_folder, report_name, runby, processing_engine)
+    report_filename = _render_report(descriptions, results, output_folder, report_name, runby, processing_engines)
         
     return report_filename
 
+def compile_datasets(description_files_root_path=DATASET_PATH, pattern=None):
+    """
+    Write the binary sidecars of the reference trajectories of the tests, so
+    that they do not need to be parsed in each run
+
+    :returns: the list of sidecar files
+    """
+
+    descriptions = _fetch_test_descriptions(description_files_root_path, pattern)
+
+    return trajectory.compile_trajectories(descriptions, description_files_root_path)
+
+def fetch_datasets(description_files_root_path=DATASET_PATH, pattern=None, mirror_folder=fetcher.MIRROR_FOLDER):
+    """
+    Download the dataset files that are missing, as long as their source is 
+    defined in the test description
+
+    :returns: the list of files placed into the dataset folders
+    """
+
+    descriptions = _fetch_test_descriptions(description_files_root_path, pattern)
+
+    return fetcher.fetch_datasets(descriptions, description_files_root_path, mirror_folder=mirror_folder)
+
+def get_test_descriptions(description_files_root_path=DATASET_PATH, pattern=None):
+    """
+    Get the descriptions of the available tests, indexed by test name
+    """
+
+    return _fetch_test_descriptions(description_files_root_path, pattern)
+
 def get_test_list(description_files_root_path=DATASET_PATH, pattern=None):
     """
     Get the list of available tests
@@ -79,20 +165,46 @@ def get_test_list(description_files_root_path=DATASET_PATH, pattern=None):
 
 # ------------------------------------------------------------------------------
 
+def _get_named_engines(processing_engine):
+
+    if isinstance(processing_engine, dict):
+        if not processing_engine:
+            raise ValueError('At least one processing engine must be provided')
+        return processing_engine
+
+    return {DEFAULT_ENGINE_NAME: processing_engine}
+
+# ------------------------------------------------------------------------------
+
 def _get_description_files(description_files_root_path, pattern):
 
-    description_files_path = os.path.join(description_files_root_path, '*/description.json')
+    description_files_path = _get_description_file(description_files_root_path, '*')
     description_files = glob.glob(description_files_path)
 
     out = []
     for description_file in sorted(description_files):
-        if pattern is None or pattern in description_file:
+        if _match_pattern(description_file, pattern):
             out.append(description_file)
 
     return out
 
 # ------------------------------------------------------------------------------
 
+def _get_description_file(description_files_root_path, test_short_name):
+
+    return os.path.join(description_files_root_path, test_short_name, 'description.json')
+
+# ------------------------------------------------------------------------------
+
+def _match_pattern(description_file, pattern):
+    """
+    Patterns are matched against the full path of the description file
+    """
+
+    return pattern is None or pattern in description_file
+
+# ------------------------------------------------------------------------------
+
 def _fetch_test_descriptions(description_files_root_path, pattern=None):
 
     description_files = _get_description_files(description_files_root_path, pattern)
@@ -113,64 +225,233 @@ def _fetch_test_descriptions(description_files_root_path, pattern=None):
     
 # ------------------------------------------------------------------------------
 
-def _run_processing_engine(descriptions, description_files_root_path, processing_engine):
+def _run_processing_engines(descriptions, description_files_root_path, processing_engines, quick_profile=None,
+                            run_folder=None, durations_file=None, references_cache=None):
+    """
+    Run all engines over the datasets. The inputs and the references are
+    prepared only once per test and shared among the engines. The jobs of 
+    all tests are scheduled together, starting with the ones that took longer 
+    in previous runs, and each engine runs as many jobs at the same time as 
+    its 'max_workers' attribute (1 if not defined)
+    """
 
-    results = {}
+    run_journal = journal.RunJournal(run_folder, description_files_root_path) if run_folder else None
+    durations = journal.DurationHistory(durations_file) if durations_file else None
 
+    results = {engine_name: {} for engine_name in processing_engines}
+
+    jobs = []
     for test_short_name, description in descriptions.items():
 
-        test_data_path = os.path.join(description_files_root_path, test_short_name)
-        test_files = glob.glob(os.path.join(test_data_path, '*'))
+        test_data_path = os.path.abspath(os.path.join(description_files_root_path, test_short_name))
+
+        inputs = _get_inputs(description, test_data_path)
+
+        window = None
+        if quick_profile:
+            logger.debug(f'Trimming inputs of {test_short_name} ({quick_profile})')
+            inputs, window = quick.trim_inputs(inputs, quick_profile)
+
+        references = _get_references(description, test_data_path, window=window, 
+                                     references_cache=references_cache)
+
+        configurations = description['configurations']
+        for engine_name in processing_engines:
+
+            results[engine_name][test_short_name] = [None] * len(configurations)
+
+            for i_conf, configuration in enumerate(configurations):
+                job = {
+                    'key': journal.get_key(engine_name, test_short_name, i_conf, configuration,
+                                           quick_profile=quick_profile, 
+                                           engine=processing_engines[engine_name]),
+                    'engine_name': engine_name,
+                    'test_short_name': test_short_name,
+                    'i_conf': i_conf,
+                    'cfg': {**inputs, **configuration, 'label': f"gnss_benchmark__{test_short_name}_{configuration['strategy']}"},
+                    'reference': references.get(configuration['strategy'], None)
+                }
+                jobs.append(job)
+
+    pending_jobs = []
+    for job in jobs:
+        if run_journal is not None and job['key'] in run_journal:
+            logger.debug(f'Using recorded solution for {job["key"]}')
+            positions = run_journal.load_solution(job['key'])
+            enus = compute_enu_differences(positions, job['reference'])
+            results[job['engine_name']][job['test_short_name']][job['i_conf']] = enus
+        else:
+            pending_jobs.append(job)
 
-        src_dir = os.getcwd()
-        with tempfile.TemporaryDirectory() as tempfolder:
+    pending_jobs = _sort_by_expected_duration(pending_jobs, durations)
 
-            for test_file in test_files:
-                shutil.copy(test_file, tempfolder) 
+    executors = {engine_name: concurrent.futures.ThreadPoolExecutor(max_workers=getattr(engine, 'max_workers', 1))
+                 for engine_name, engine in processing_engines.items()}
 
-            os.chdir(tempfolder)
+    try:
+        futures = {}
+        for job in pending_jobs:
+            engine_name = job['engine_name']
+            future = executors[engine_name].submit(_run_job, job, processing_engines[engine_name],
+                                                   run_journal, durations)
+            futures[future] = job
 
-            results[test_short_name] = []
+        for future in concurrent.futures.as_completed(futures):
+            job = futures[future]
+            results[job['engine_name']][job['test_short_name']][job['i_conf']] = future.result()
+
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+
+    return results
 
-            for configuration in description['configurations']:
+# ------------------------------------------------------------------------------
 
-                strategy = configuration['strategy']
+def _get_inputs(description, test_data_path):
+    """
+    Inputs of a test, with the files given as absolute paths
+    """
 
-                cfg = {**description['inputs'], **configuration}
-                cfg['label'] = "gnss_benchmark__{}_{}".format(test_short_name, strategy)
-                logger.debug('Running processing engine for {} / {}'.format(test_short_name, strategy))
-                positions = processing_engine.run(**cfg)
+    inputs = dict(description['inputs'])
 
-                logger.debug('Computing ENU differences relative to reference')
+    for key, value in inputs.items():
+        if key.endswith('_file') and value:
+            inputs[key] = os.path.join(test_data_path, value)
 
-                reference = None
-                if 'validation' in description:
-                    validation = description['validation']
-                    reference = None
-                    if 'reference_position' in validation:
-                        logger.debug(f'Found Reference position for strategy {strategy}')
-                        try:
-                            ecef_m = validation['reference_position'][strategy]
-                            logger.debug(f'Found Reference position for strategy {strategy}: {str(ecef_m)}')
-                            llh = transformer_xyz_lla.transform(*ecef_m)
-                            reference = jason.PositionFix(datetime.datetime.now(), *llh)
-                        except KeyError:
-                            pass
+    return inputs
 
-                    elif 'reference_trajectory' in validation:
-                        try:
-                            logger.debug(f'Found reference trajectory for strategy {strategy}')
-                            trajectory_file =  validation['reference_trajectory'][strategy]
-                            reference = jason.convert_csv_output_to_processing_solutions(trajectory_file)
-                        except KeyError:
-                            pass
+# ------------------------------------------------------------------------------
 
-                enus = compute_enu_differences(positions, reference)
-                results[test_short_name].append(enus)
+def _sort_by_expected_duration(jobs, durations):
+    """
+    Sort the jobs so that the longest ones (according to previous runs) are
+    started first. Jobs without a recorded duration are started before all 
+    others, since they might be the longest ones
+    """
 
-            os.chdir(src_dir)
+    if durations is None:
+        return jobs
 
-    return results
+    def expected_duration(job):
+        duration = durations.get(job['key'])
+        return float('inf') if duration is None else duration
+
+    return sorted(jobs, key=expected_duration, reverse=True)
+
+# ------------------------------------------------------------------------------
+
+def _run_job(job, processing_engine, run_journal, durations):
+
+    logger.debug('Running processing engine for {}'.format(job['key']))
+
+    start_time = time.time()
+    positions = processing_engine.run(**job['cfg'])
+    duration = time.time() - start_time
+
+    # Failed runs are not recorded, since their duration is not representative
+    if durations is not None and positions is not None:
+        try:
+            durations.update(job['key'], duration)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Could not record the duration of {job["key"]}: {e}')
+
+    if run_journal is not None and positions is not None:
+        run_journal.record(job['key'], positions, duration)
+
+    logger.debug('Computing ENU differences relative to reference')
+    return compute_enu_differences(positions, job['reference'])
+
+# ------------------------------------------------------------------------------
+
+def _get_references(description, test_data_path, window=None, references_cache=None):
+    """
+    Build the reference (position or trajectory) for each strategy of the
+    test description. Trajectory files shared among strategies are loaded once
+    (from their binary sidecar if compiled) and, if a time window (start and 
+    end epochs) is given, trimmed to it. Loaded trajectories are kept in the
+    references cache (if given) to be reused in later runs
+    """
+
+    if references_cache is None:
+        references_cache = ReferencesCache()
+
+    references = {}
+
+    validation = description.get('validation', {})
+
+    if 'reference_position' in validation:
+        for strategy, ecef_m in validation['reference_position'].items():
+            logger.debug(f'Found Reference position for strategy {strategy}: {str(ecef_m)}')
+            _, transformer_xyz_lla = get_transformers()
+            llh = transformer_xyz_lla.transform(*ecef_m)
+            references[strategy] = jason.PositionFix(datetime.datetime.now(), *llh)
+
+    elif 'reference_trajectory' in validation:
+        for strategy, trajectory_file in validation['reference_trajectory'].items():
+            logger.debug(f'Found reference trajectory for strategy {strategy}')
+            trajectory_path = os.path.join(test_data_path, trajectory_file)
+            references[strategy] = references_cache.get((trajectory_path, window), 
+                                                        lambda: _load_reference(trajectory_path, window))
+
+    return references
+
+# ------------------------------------------------------------------------------
+
+def _load_reference(trajectory_path, window=None):
+    """
+    :returns: the reference trajectory, or None if it has no solutions
+              within the time window
+    """
+
+    reference = trajectory.load_trajectory(trajectory_path)
+    if window:
+        reference = quick.trim_solutions(reference, *window)
+        if not len(reference):
+            logger.warning(f'Reference trajectory [ {trajectory_path} ] does not overlap with '
+                           f'the time window [ {window[0]} - {window[1]} ], skipping validation')
+            return None
+
+    return reference
+
+# ------------------------------------------------------------------------------
+
+class ReferencesCache(object):
+    """
+    Thread safe cache of reference trajectories that keeps (at most) the 
+    'max_size' most recently used ones
+    """
+
+    def __init__(self, max_size: int = 32):
+
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, load):
+        """
+        Get an entry of the cache, calling 'load' to build it if not present
+        """
+
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        # Loaded outside the lock, so that other entries can be used meanwhile
+        value = load()
+
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+        return value
  
 # ------------------------------------------------------------------------------
 
@@ -179,6 +460,8 @@ def compute_enu_differences(positions, reference):
     if positions is None or reference is None:
         return None
 
+    transformer_lla_xyz, _ = get_transformers()
+
     enus = []
     for position in positions:
         position_ref = reference.interpolate(position.epoch)
@@ -202,7 +485,7 @@ def compute_enu_differences(positions, reference):
 
 # ------------------------------------------------------------------------------
 
-def _render_report(descriptions, results, output_folder, report_name, runby, processing_engine):
+def _render_report(descriptions, results, output_folder, report_name, runby, processing_engines):
     
 
     statistics = _compute_statistics(descriptions, results)
@@ -216,17 +499,15 @@ def _render_report(descriptions, results, output_folder, report_name, runby, pro
     output_abspath = os.path.abspath(output_folder)
     logger.debug(f'Output absolute path [ {output_abspath} ]')
 
-    cwd = os.getcwd()
     with tempfile.TemporaryDirectory() as tempfolder:
-        os.chdir(tempfolder)
 
         figure_path = os.path.join(tempfolder, 'figures')
         os.mkdir(figure_path)
 
         figures = {}
         for test_name, description in descriptions.items():
-            result = results[test_name]
-            figures[test_name] = _make_plots(test_name, description, result, figure_path)
+            test_results = {engine_name: results[engine_name][test_name] for engine_name in results}
+            figures[test_name] = _make_plots(test_name, description, test_results, figure_path)
 
         doc = None
         with open(os.path.join(TEMPLATES_PATH, 'report.md.jinja'), 'r') as fh:
@@ -237,7 +518,7 @@ def _render_report(descriptions, results, output_folder, report_name, runby, pro
                 'date': datetime.datetime.utcnow(),
                 'runby': runby,
                 'statistic_tables': statistic_tables,
-                'engine_version': processing_engine.version()
+                'engine_versions': {k: v.version() for k, v in processing_engines.items()}
             }
             doc = template.render(render_values)
 
@@ -261,14 +542,12 @@ def _render_report(descriptions, results, output_folder, report_name, runby, pro
 
         else:
             cmd = ["pandoc", "-o", output_filename, markdown_filename]
-            p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=tempfolder)
             stdout, stderr = p.communicate()
 
             logger.debug(f'pandoc stdout: {stdout}')
             logger.debug(f'pandoc stderr: {stderr}')
 
-        os.chdir(cwd)
-
         logger.debug(f'Written report: {output_filename}')
 
     return output_filename
@@ -298,22 +577,25 @@ def compute_horiz_and_vertical_rms(enus: list = []) -> Tuple[float, float]:
 def _compute_statistics(descriptions, results):
     
     statistics = {}
-    for test_short_name,result in results.items():
+    for engine_name, engine_results in results.items():
+
+        statistics[engine_name] = {}
+        for test_short_name, result in engine_results.items():
 
-        conf_list = enumerate(descriptions[test_short_name]['configurations'])
+            conf_list = enumerate(descriptions[test_short_name]['configurations'])
         
-        statistics[test_short_name] = []
-        for i_conf, _ in conf_list:
+            statistics[engine_name][test_short_name] = []
+            for i_conf, _ in conf_list:
 
-            rms = compute_horiz_and_vertical_rms(result[i_conf])
+                rms = compute_horiz_and_vertical_rms(result[i_conf])
 
-            statistics[test_short_name].append(rms)
+                statistics[engine_name][test_short_name].append(rms)
             
     return statistics    
 
 # ------------------------------------------------------------------------------
 
-def _make_plots(test_name, description, result, dst_folder):
+def _make_plots(test_name, description, results, dst_folder):
     
     enus = {}
     for i_config, config in enumerate(description['configurations']):
@@ -322,36 +604,47 @@ def _make_plots(test_name, description, result, dst_folder):
         dynamics = config['rover_dynamics']
         
         if strategy not in enus:
-            enus[strategy] = {}
+            enus[strategy] = {engine_name: {} for engine_name in results}
         
-        enus[strategy][dynamics] = result[i_config]
+        for engine_name, result in results.items():
+            enus[strategy][engine_name][dynamics] = result[i_config]
 
         
     filenames = []
+
+    show_engine_name = len(results) > 1
     
     for strategy in enus:
         
-        fig = plt.figure(figsize=(10,10))
+        fig = matplotlib.figure.Figure(figsize=(10,10))
         ax = fig.gca()
 
         name = description['info']['name']
         ax.set_title(f'{name} - {strategy}\nDifference ($\Delta$) against reference')
 
-        if enus[strategy]['dynamic'] is not None and enus[strategy]['static'] is not None:
+        max_delta = 0
+        for i_engine, (engine_name, engine_enus) in enumerate(enus[strategy].items()):
 
-            enu_dynamic = np.array(enus[strategy]['dynamic'])
-            enu_static = np.array(enus[strategy]['static'])
-            ax.plot(enu_dynamic[:,0], enu_dynamic[:,1], '.b', color='#0072bd', markersize=2, label='dynamic')
-            ax.plot(enu_static[:,0], enu_static[:,1], '.r', color='#a2142f', markersize=14, label='static')
-            ax.legend()
-            ax.set_aspect('equal')
+            color = ENGINE_COLORS[i_engine % len(ENGINE_COLORS)]
+            prefix = f'{engine_name} ' if show_engine_name else ''
 
-            max_delta = max( [max(np.abs(enu_dynamic[:,0]-enu_static[:,0])), max(np.abs(enu_dynamic[:,1]-enu_static[:,1]))] )
+            enu_dynamic = engine_enus.get('dynamic', None)
+            if enu_dynamic is not None:
+                enu_dynamic = np.array(enu_dynamic)
+                ax.plot(enu_dynamic[:,0], enu_dynamic[:,1], '.', color=color, markersize=2, 
+                        label=f'{prefix}dynamic')
+                max_delta = max([max_delta, max(np.abs(enu_dynamic[:,0])), max(np.abs(enu_dynamic[:,1]))])
 
-            ax.set_xlim(enu_static[:,0]-max_delta, enu_static[:,0]+max_delta)
-            ax.set_ylim(enu_static[:,1]-max_delta, enu_static[:,1]+max_delta)
+            enu_static = engine_enus.get('static', None)
+            if enu_static is not None:
+                enu_static = np.array(enu_static)
+                ax.plot(enu_static[:,0], enu_static[:,1], 'o', color=color, markersize=14, 
+                        markeredgecolor='k', label=f'{prefix}static')
+                max_delta = max([max_delta, max(np.abs(enu_static[:,0])), max(np.abs(enu_static[:,1]))])
 
-            max_delta = max( [max(np.abs(enu_dynamic[:,0])), max(np.abs(enu_dynamic[:,1]))] )
+        if max_delta > 0:
+            ax.legend()
+            ax.set_aspect('equal')
 
             ax.set_xlim(-max_delta, +max_delta)
             ax.set_ylim(-max_delta, +max_delta)
@@ -360,9 +653,8 @@ def _make_plots(test_name, description, result, dst_folder):
             ax.set_ylabel('$\Delta$ Northing [m]')
             ax.grid(color='0.95')
 
-        plt.plot()
         output_file = os.path.join(dst_folder, f'{test_name}_{strategy.lower()}.{FIGURE_FORMAT}')
-        plt.savefig(output_file)
+        fig.savefig(output_file)
         filenames.append(os.path.basename(output_file))
 
     return filenames
@@ -373,20 +665,31 @@ def _build_markdown_tables(descriptions, statistics):
     
     statistics_md = {}
 
-    for test_short_name, stats in statistics.items():
+    engine_names = list(statistics.keys())
+    show_engine_name = len(engine_names) > 1
 
-        markdown_table = '| strategy | dynamics | Horizontal error [m] | Vertical error [m] |\n'
-        markdown_table += '|:---:|:---:|:---:|:---:|\n'
-        
-        description = descriptions[test_short_name]
+    for test_short_name, description in descriptions.items():
 
+        header = '| strategy | dynamics |'
+        alignment = '|:---:|:---:|'
+        for engine_name in engine_names:
+            suffix = f' ({engine_name})' if show_engine_name else ''
+            header += f' Horizontal error [m]{suffix} | Vertical error [m]{suffix} |'
+            alignment += ':---:|:---:|'
+
+        markdown_table = header + '\n' + alignment + '\n'
+        
         configurations = enumerate(description['configurations'])
         for i_conf, configuration in configurations:
             strategy = configuration['strategy']
             dynamics = configuration['rover_dynamics']
-            rms_h, rms_v = stats[i_conf]
-        
-            markdown_table += '|{}|{}|{:.3f}|{:.3f}|\n'.format(strategy, dynamics, rms_h, rms_v)
+
+            markdown_table += '|{}|{}|'.format(strategy, dynamics)
+            for engine_name in engine_names:
+                rms_h, rms_v = statistics[engine_name][test_short_name][i_conf]
+                markdown_table += '{:.3f}|{:.3f}|'.format(rms_h, rms_v)
+
+            markdown_table += '\n'
 
         statistics_md[test_short_name] = markdown_table
 
@@ -0,0 +1,399 @@
+"""
+Benchmark service: long running process that accepts benchmark jobs through
+a local HTTP API, keeping warm the state that is otherwise built in each run
+(imports, engine instances, dataset catalog and reference trajectories).
+
+HTTP API:
+
+    POST /jobs               Submit a job. The body is a JSON object with the
+                             (optional) fields: tests, pattern, report_name,
+                             runby and quick (with start, duration and
+                             interval). Returns the job status
+    GET  /jobs               Status of all jobs
+    GET  /jobs/<id>          Status of a job
+    GET  /jobs/<id>/report   Report file of a finished job
+    GET  /tests              Names of the available tests
+    GET  /metrics            Queue depth, throughput and latency metrics
+"""
+import collections
+import datetime
+import http.server
+import json
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from roktools import logger
+
+from . import journal
+from . import quick
+from . import report
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+
+# Fields of the quick profile that can be set in a job request
+QUICK_PROFILE_FIELDS = ['start', 'duration', 'interval']
+
+
+class QueueFullError(Exception):
+    pass
+
+
+# ------------------------------------------------------------------------------
+
+class BenchmarkJob(object):
+
+    def __init__(self, parameters: dict):
+
+        self.id = uuid.uuid4().hex
+        self.parameters = parameters
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.report_filename = None
+        self.error = None
+
+    def to_dict(self):
+
+        out = {
+            'id': self.id,
+            'status': self.status,
+            'parameters': self.parameters,
+            'submitted': _format_timestamp(self.submitted),
+            'started': _format_timestamp(self.started),
+            'finished': _format_timestamp(self.finished),
+        }
+
+        if self.report_filename:
+            out['report'] = f'/jobs/{self.id}/report'
+
+        if self.error:
+            out['error'] = self.error
+
+        return out
+
+# ------------------------------------------------------------------------------
+
+class BenchmarkService(object):
+
+    def __init__(self, engine_factory, description_files_root_path: str = report.DATASET_PATH,
+                 output_folder: str = '.', workers: int = 1, max_queue: int = 100,
+                 durations_file: str = journal.DURATIONS_FILE, max_finished_jobs: int = 1000,
+                 max_references: int = 32):
+        """
+        :params engine_factory: callable that returns a new processing engine.
+                One engine per worker is created and reused for all the jobs
+        :params description_files_root_path: Folder where the test cases are located
+        :params output_folder: Folder where the reports of each job are placed
+        :params workers: Maximum number of jobs run at the same time
+        :params max_queue: Maximum number of jobs waiting to be run
+        :params durations_file: File with the duration history of the 
+                configurations (see report.make)
+        :params max_finished_jobs: Maximum number of finished jobs whose status
+                is kept (the oldest ones are forgotten first)
+        :params max_references: Maximum number of reference trajectories kept
+                in memory
+        """
+
+        self.description_files_root_path = description_files_root_path
+        self.output_folder = os.path.abspath(output_folder)
+        self.workers = workers
+        self.durations_file = durations_file
+
+        self.descriptions = report.get_test_descriptions(description_files_root_path)
+        self.references_cache = report.ReferencesCache(max_size=max_references)
+
+        self.engines = queue.Queue()
+        for _ in range(workers):
+            self.engines.put(engine_factory())
+
+        self.jobs = {}
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.start_time = time.time()
+
+        self.max_finished_jobs = max_finished_jobs
+        self.finished_jobs = collections.deque()
+        self.counts = {FINISHED: 0, FAILED: 0}
+
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'benchmark-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, parameters: dict) -> BenchmarkJob:
+
+        unknown_tests = [t for t in parameters.get('tests', []) if t not in self.descriptions]
+        if unknown_tests:
+            raise ValueError(f'Unknown tests: {unknown_tests}')
+
+        if 'quick' in parameters:
+            parameters = dict(parameters, quick=_parse_quick_profile(parameters['quick']))
+
+        job = BenchmarkJob(parameters)
+
+        with self._lock:
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError('Too many jobs waiting to be run')
+
+            self.jobs[job.id] = job
+
+        logger.info(f'Queued job {job.id}')
+
+        return job
+
+    def get_job(self, job_id: str) -> BenchmarkJob:
+        return self.jobs.get(job_id, None)
+
+    def get_jobs(self) -> list:
+
+        with self._lock:
+            return list(self.jobs.values())
+
+    def metrics(self) -> dict:
+
+        with self._lock:
+            jobs = list(self.jobs.values())
+            counts = dict(self.counts)
+
+        # Latencies are computed over the finished jobs still kept
+        done = [j for j in jobs if j.status in (FINISHED, FAILED)]
+        uptime = time.time() - self.start_time
+
+        return {
+            'uptime_s': uptime,
+            'workers': self.workers,
+            'queue_depth': self.queue.qsize(),
+            'running': len([j for j in jobs if j.status == RUNNING]),
+            'finished': counts[FINISHED],
+            'failed': counts[FAILED],
+            'throughput_jobs_per_hour': sum(counts.values()) / uptime * 3600 if uptime > 0 else 0,
+            'queue_wait_s': _compute_latency_stats([j.started - j.submitted for j in done]),
+            'run_time_s': _compute_latency_stats([j.finished - j.started for j in done]),
+            'latency_s': _compute_latency_stats([j.finished - j.submitted for j in done])
+        }
+
+    def _worker(self):
+
+        while True:
+            job = self.queue.get()
+            engine = self.engines.get()
+            try:
+                self._run(job, engine)
+            finally:
+                self.engines.put(engine)
+                self.queue.task_done()
+
+    def _run(self, job: BenchmarkJob, engine):
+
+        job.status = RUNNING
+        job.started = time.time()
+        logger.info(f'Running job {job.id}')
+
+        parameters = job.parameters
+
+        quick_profile = None
+        if 'quick' in parameters:
+            quick_profile = quick.QuickProfile(**parameters['quick'])
+
+        output_folder = os.path.join(self.output_folder, job.id)
+
+        try:
+            os.makedirs(output_folder, exist_ok=True)
+            job.report_filename = report.make(engine,
+                                              description_files_root_path=self.description_files_root_path,
+                                              output_folder=output_folder,
+                                              report_name=os.path.basename(parameters.get('report_name', 'report.pdf')),
+                                              runby=parameters.get('runby', 'info@rokubun.cat'),
+                                              tests=parameters.get('tests', []),
+                                              pattern=parameters.get('pattern', None),
+                                              quick_profile=quick_profile,
+                                              durations_file=self.durations_file,
+                                              descriptions=self.descriptions,
+                                              references_cache=self.references_cache)
+            status = FINISHED
+
+        except Exception as e:
+            logger.critical(f'Job {job.id} failed: {e}')
+            job.error = str(e)
+            status = FAILED
+
+        # The end time is set before the status, so that finished jobs always
+        # have their timing complete (see metrics)
+        job.finished = time.time()
+        job.status = status
+
+        with self._lock:
+            self.counts[status] += 1
+            self.finished_jobs.append(job.id)
+            while len(self.finished_jobs) > self.max_finished_jobs:
+                del self.jobs[self.finished_jobs.popleft()]
+
+# ------------------------------------------------------------------------------
+
+def make_server(service: BenchmarkService, host: str = '127.0.0.1', port: int = 8080) -> http.server.HTTPServer:
+    """
+    Build the HTTP server that exposes the API of the service
+    """
+
+    class RequestHandler(http.server.BaseHTTPRequestHandler):
+
+        def do_GET(self):
+
+            parts = [p for p in self.path.split('?')[0].split('/') if p]
+
+            if parts == ['metrics']:
+                self._send_json(200, service.metrics())
+
+            elif parts == ['tests']:
+                self._send_json(200, sorted(service.descriptions.keys()))
+
+            elif parts == ['jobs']:
+                self._send_json(200, [job.to_dict() for job in service.get_jobs()])
+
+            elif len(parts) in (2, 3) and parts[0] == 'jobs' and service.get_job(parts[1]):
+                job = service.get_job(parts[1])
+                if len(parts) == 2:
+                    self._send_json(200, job.to_dict())
+                elif parts[2] == 'report' and job.report_filename:
+                    self._send_file(job.report_filename)
+                else:
+                    self._send_json(404, {'error': 'Not found'})
+
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+
+            if self.path.rstrip('/') != '/jobs':
+                self._send_json(404, {'error': 'Not found'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                parameters = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(parameters, dict):
+                    raise ValueError('Job parameters must be a JSON object')
+
+                job = service.submit(parameters)
+                self._send_json(202, job.to_dict())
+
+            except QueueFullError as e:
+                self._send_json(503, {'error': str(e)})
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            logger.debug('{} - {}'.format(self.address_string(), format % args))
+
+        def _send_json(self, code, value):
+
+            body = json.dumps(value, indent=4).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_file(self, filename):
+
+            with open(filename, 'rb') as fh:
+                body = fh.read()
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(filename)}"')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return http.server.ThreadingHTTPServer((host, port), RequestHandler)
+
+# ------------------------------------------------------------------------------
+
+def serve(service: BenchmarkService, host: str = '127.0.0.1', port: int = 8080):
+    """
+    Start the workers of the service and serve the HTTP API until interrupted
+    """
+
+    service.start()
+
+    server = make_server(service, host=host, port=port)
+    logger.info(f'Serving benchmark jobs on http://{host}:{server.server_address[1]}')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# ------------------------------------------------------------------------------
+
+def _parse_quick_profile(value) -> dict:
+    """
+    Validate the quick profile of a job request. Only the time window and
+    the interval can be set by clients (trimmed files are always placed in
+    the default cache folder)
+    """
+
+    if not isinstance(value, dict):
+        raise ValueError('Invalid quick profile: must be a JSON object')
+
+    unknown_fields = sorted(set(value) - set(QUICK_PROFILE_FIELDS))
+    if unknown_fields:
+        raise ValueError(f'Invalid quick profile: unknown fields {unknown_fields}')
+
+    out = {}
+    for field, field_value in value.items():
+        if field == 'interval' and field_value is None:
+            out[field] = None
+            continue
+
+        try:
+            out[field] = float(field_value)
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid quick profile: {field} must be a number')
+
+        if not math.isfinite(out[field]) or out[field] < 0:
+            raise ValueError(f'Invalid quick profile: {field} must be a non negative number')
+
+    return out
+
+# ------------------------------------------------------------------------------
+
+def _compute_latency_stats(values: list) -> dict:
+
+    if not values:
+        return None
+
+    return {
+        'mean': float(np.mean(values)),
+        'p50': float(np.percentile(values, 50)),
+        'p95': float(np.percentile(values, 95)),
+        'max': float(np.max(values))
+    }
+
+# ------------------------------------------------------------------------------
+
+def _format_timestamp(timestamp: float) -> str:
+
+    if timestamp is None:
+        return None
+
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
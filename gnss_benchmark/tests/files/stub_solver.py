@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Stub command line solver used to test the subprocess processing engine. It
+writes a fixed solution, whose height encodes the requested dynamics
+"""
+import argparse
+
+parser = argparse.ArgumentParser()
+parser.add_argument('rover_file')
+parser.add_argument('-o', '--output', required=True)
+parser.add_argument('-s', '--strategy', required=True)
+parser.add_argument('-b', '--base')
+parser.add_argument('--static', action='store_true')
+args = parser.parse_args()
+
+with open(args.rover_file, 'r') as fh:
+    fh.read()
+
+height = 100.0 if args.static else 200.0
+
+with open(args.output, 'w') as fh:
+    fh.write('GPSW,GPSSoW,latitudedeg,longitudedeg,heightm\n')
+    fh.write(f'2134,46615.000000,41.6423503240,2.3593755210,{height}\n')
+    fh.write(f'2134,46616.000000,41.6423503240,2.3593755210,{height}\n')
@@ -0,0 +1,27 @@
+import os.path
+
+import gnss_benchmark.jason as jason
+
+# ------------------------------------------------------------------------------
+
+class ReferenceEngine(object):
+    """
+    Processing engine stub that returns the reference trajectory of the test
+    (so that all errors are zero) and keeps track of the configurations run
+    """
+
+    instances = 0
+
+    def __init__(self, name='reference', trajectory_file=None):
+        ReferenceEngine.instances += 1
+        self.name = name
+        self.trajectory_file = trajectory_file
+        self.runs = []
+
+    def version(self):
+        return {jason.ENGINE_NAME_STR: self.name}
+
+    def run(self, rover_file, strategy, rover_dynamics, **kwargs):
+        self.runs.append((strategy, rover_dynamics))
+        trajectory_file = self.trajectory_file or os.path.join(os.path.dirname(rover_file), 'reference_trajectory.csv')
+        return jason.convert_csv_output_to_processing_solutions(trajectory_file)
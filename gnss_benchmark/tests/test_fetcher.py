@@ -0,0 +1,167 @@
+import hashlib
+import http.server
+import json
+import os.path
+import shutil
+import threading
+
+import pytest
+
+import gnss_benchmark.fetcher as fetcher
+
+CONTENT = b'rinex data ' * 1000
+
+# ------------------------------------------------------------------------------
+
+class RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+
+    requests = []
+
+    def do_GET(self):
+
+        RangeRequestHandler.requests.append((self.path, self.headers.get('Range', None)))
+
+        if self.path != '/rover.rnx':
+            self.send_error(404)
+            return
+
+        offset = 0
+        range_header = self.headers.get('Range', None)
+        if range_header:
+            offset = int(range_header.split('=')[1].split('-')[0])
+            self.send_response(206)
+        else:
+            self.send_response(200)
+
+        body = CONTENT[offset:]
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+# ------------------------------------------------------------------------------
+
+@pytest.fixture
+def http_server():
+
+    RangeRequestHandler.requests = []
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RangeRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+    server.shutdown()
+    server.server_close()
+
+# ------------------------------------------------------------------------------
+
+def _make_dataset(root, name, sources):
+
+    os.makedirs(os.path.join(root, name))
+    description = {'inputs': {'rover_file': 'rover.rnx'}, 'sources': sources}
+    with open(os.path.join(root, name, 'description.json'), 'w') as fh:
+        json.dump(description, fh)
+
+    return description
+
+# ------------------------------------------------------------------------------
+
+def test_fetcher__fetch_datasets(tmpdir, http_server):
+
+    root = str(tmpdir.mkdir('datasets'))
+    mirror = str(tmpdir.mkdir('mirror'))
+
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    sources = {'rover.rnx': {'url': http_server + '/rover.rnx', 'sha256': sha256}}
+    descriptions = {
+        'test_a': _make_dataset(root, 'test_a', sources),
+        'test_b': _make_dataset(root, 'test_b', sources)
+    }
+
+    fetched_files = fetcher.fetch_datasets(descriptions, root, mirror_folder=mirror)
+
+    assert fetched_files == [os.path.join(root, 'test_a', 'rover.rnx'), os.path.join(root, 'test_b', 'rover.rnx')]
+    assert len(RangeRequestHandler.requests) == 1
+    assert os.path.isfile(fetcher.get_mirror_filename(mirror, sha256))
+
+    for fetched_file in fetched_files:
+        with open(fetched_file, 'rb') as fh:
+            assert fh.read() == CONTENT
+
+    # Files already in place (or in the mirror) are not downloaded again
+    assert fetcher.fetch_datasets(descriptions, root, mirror_folder=mirror) == []
+    os.remove(fetched_files[0])
+    assert fetcher.fetch_datasets(descriptions, root, mirror_folder=mirror) == fetched_files[:1]
+    assert len(RangeRequestHandler.requests) == 1
+
+# ------------------------------------------------------------------------------
+
+def test_fetcher__resume_partial_download(tmpdir, http_server):
+
+    mirror = str(tmpdir)
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+
+    partial_folder = os.path.join(mirror, 'partial')
+    os.makedirs(partial_folder)
+    with open(os.path.join(partial_folder, sha256 + fetcher.PARTIAL_EXTENSION), 'wb') as fh:
+        fh.write(CONTENT[:100])
+
+    mirror_file = fetcher.fetch(http_server + '/rover.rnx', mirror, sha256)
+
+    assert RangeRequestHandler.requests == [('/rover.rnx', 'bytes=100-')]
+    with open(mirror_file, 'rb') as fh:
+        assert fh.read() == CONTENT
+
+# ------------------------------------------------------------------------------
+
+def test_fetcher__checksum_mismatch(tmpdir, http_server):
+
+    with pytest.raises(fetcher.ChecksumError):
+        fetcher.fetch(http_server + '/rover.rnx', str(tmpdir), '0' * 64)
+
+    assert not os.path.isfile(fetcher.get_mirror_filename(str(tmpdir), '0' * 64))
+
+# ------------------------------------------------------------------------------
+
+def test_fetcher__link_errors_do_not_abort(tmpdir, http_server):
+
+    root = str(tmpdir.mkdir('datasets'))
+    mirror = str(tmpdir.mkdir('mirror'))
+
+    sources = {'rover.rnx': {'url': http_server + '/rover.rnx'}}
+    descriptions = {
+        'test_a': _make_dataset(root, 'test_a', sources),
+        'test_b': _make_dataset(root, 'test_b', sources)
+    }
+
+    # Dataset folder that cannot be written
+    shutil.rmtree(os.path.join(root, 'test_a'))
+
+    fetched_files = fetcher.fetch_datasets(descriptions, root, mirror_folder=mirror)
+
+    assert fetched_files == [os.path.join(root, 'test_b', 'rover.rnx')]
+
+# ------------------------------------------------------------------------------
+
+def test_fetcher__link_file_error(tmpdir, monkeypatch):
+
+    src_file = str(tmpdir.join('src'))
+    dst_file = str(tmpdir.join('dst'))
+    with open(src_file, 'wb') as fh:
+        fh.write(CONTENT)
+
+    def fail(*args, **kwargs):
+        raise PermissionError('Operation not permitted')
+
+    for name in ['link', 'symlink']:
+        monkeypatch.setattr(os, name, fail)
+    monkeypatch.setattr(shutil, 'copy', fail)
+
+    with pytest.raises(PermissionError):
+        fetcher.link_file(src_file, dst_file)
+
+    assert not os.path.exists(dst_file)
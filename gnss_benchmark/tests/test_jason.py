@@ -1,4 +1,5 @@
 import datetime
+import gzip
 import os.path
 
 import roktools.time
@@ -52,3 +53,61 @@ def test_jason__extract_solution_from_zip():
     out = jason.extract_solution_from_zip(zip_file, 'PPK')
     assert isinstance(out, jason.ProcessingSolutions)
     assert len(out) == 289
+
+# ------------------------------------------------------------------------------
+
+def test_jason__upload_files_compressed_once(tmpdir):
+
+    filenames = [os.path.join(str(tmpdir), name) for name in ['a.obs', 'b.obs', 'c.obs']]
+    contents = [b'rover data', b'rover data', b'base data']
+    for filename, content in zip(filenames, contents):
+        with open(filename, 'wb') as fh:
+            fh.write(content)
+
+    engine = jason.ProcessingEngine(compress_inputs=True)
+
+    upload_a = engine._get_upload_file(filenames[0])
+    upload_b = engine._get_upload_file(filenames[1])
+    upload_c = engine._get_upload_file(filenames[2])
+
+    assert upload_a != upload_c
+    assert os.path.basename(upload_a) == 'a.obs.gz'
+    assert os.path.basename(upload_b) == 'b.obs.gz'
+    assert engine._get_upload_file(filenames[0]) == upload_a
+    assert engine._get_upload_file(filenames[1]) == upload_b
+
+    with gzip.open(upload_b, 'rb') as fh:
+        assert fh.read() == b'rover data'
+
+    with gzip.open(upload_c, 'rb') as fh:
+        assert fh.read() == b'base data'
+
+    assert engine._get_upload_file(None) is None
+    assert engine._get_upload_file(upload_a) == upload_a
+    assert jason.ProcessingEngine()._get_upload_file(filenames[0]) == filenames[0]
+
+# ------------------------------------------------------------------------------
+
+def test_jason__upload_checksum_computed_once(tmpdir, monkeypatch):
+
+    filename = os.path.join(str(tmpdir), 'a.obs')
+    with open(filename, 'wb') as fh:
+        fh.write(b'rover data')
+
+    hashed = []
+    compute_file_hash = jason.compute_file_hash
+    monkeypatch.setattr(jason, 'compute_file_hash', lambda f: hashed.append(f) or compute_file_hash(f))
+
+    engine = jason.ProcessingEngine(compress_inputs=True)
+
+    engine._get_upload_file(filename)
+    engine._get_upload_file(filename)
+    assert len(hashed) == 1
+
+    # Modified file is hashed (and compressed) again
+    with open(filename, 'wb') as fh:
+        fh.write(b'new rover data')
+
+    with gzip.open(engine._get_upload_file(filename), 'rb') as fh:
+        assert fh.read() == b'new rover data'
+    assert len(hashed) == 2
@@ -0,0 +1,83 @@
+import os.path
+import threading
+
+import gnss_benchmark.journal as journal
+import gnss_benchmark.local as local
+import gnss_benchmark.quick as quick
+import gnss_benchmark.report as report
+
+from helpers import ReferenceEngine
+
+# ------------------------------------------------------------------------------
+
+def test_journal__concurrent_duration_histories(tmpdir):
+
+    durations_file = str(tmpdir.join('durations.json'))
+
+    def update(i_thread):
+        durations = journal.DurationHistory(durations_file)
+        for i in range(20):
+            durations.update(f'engine/test/{i_thread}_{i}', float(i))
+
+    threads = [threading.Thread(target=update, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    durations = journal.DurationHistory(durations_file)
+    assert len(durations.durations) == 80
+
+# ------------------------------------------------------------------------------
+
+def test_journal__duration_history_errors_do_not_fail_jobs(tmpdir):
+
+    # Parent "folder" of the durations file is a regular file, so it cannot be written
+    blocker = tmpdir.join('blocker')
+    blocker.write('')
+    durations_file = str(blocker.join('durations.json'))
+
+    engine = ReferenceEngine('a')
+    report_filename = report.make(engine, output_folder=str(tmpdir), report_name='report.md',
+                                  tests=['mosaicx5_multi_dynamic'], durations_file=durations_file)
+
+    assert os.path.isfile(report_filename)
+
+# ------------------------------------------------------------------------------
+
+def test_journal__quick_profile_in_key():
+
+    configuration = {'strategy': 'PPP', 'rover_dynamics': 'static'}
+
+    full_key = journal.get_key('engine', 'test', 0, configuration)
+    quick_key = journal.get_key('engine', 'test', 0, configuration, quick_profile=quick.QuickProfile(duration=60))
+
+    assert full_key == 'engine/test/0_PPP_static'
+    assert quick_key != full_key
+
+# ------------------------------------------------------------------------------
+
+def test_journal__engine_in_key():
+
+    configuration = {'strategy': 'PPP', 'rover_dynamics': 'static'}
+
+    engines = [ReferenceEngine('a'), ReferenceEngine('b'), local.SubprocessProcessingEngine(['solver'], name='a')]
+    keys = [journal.get_key('engine', 'test', 0, configuration, engine=engine) for engine in engines]
+
+    assert keys[0] == journal.get_key('engine', 'test', 0, configuration, engine=ReferenceEngine('a'))
+    assert len(set(keys)) == len(keys)
+
+# ------------------------------------------------------------------------------
+
+def test_journal__resume_with_another_engine(tmpdir):
+
+    run_folder = str(tmpdir.join('run'))
+
+    report.make(ReferenceEngine('a'), output_folder=str(tmpdir), report_name='report.md',
+                tests=['mosaicx5_multi_dynamic'], run_folder=run_folder, durations_file=None)
+
+    engine = ReferenceEngine('b')
+    report.make(engine, output_folder=str(tmpdir), report_name='report.md',
+                tests=['mosaicx5_multi_dynamic'], run_folder=run_folder, durations_file=None)
+
+    assert len(engine.runs) == 3
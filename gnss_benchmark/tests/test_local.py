@@ -0,0 +1,78 @@
+import os.path
+import sys
+
+import gnss_benchmark.jason as jason
+import gnss_benchmark.local as local
+
+STUB_SOLVER = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'files/stub_solver.py')
+
+# ------------------------------------------------------------------------------
+
+def _make_engine(**kwargs):
+
+    return local.SubprocessProcessingEngine(
+        [sys.executable, STUB_SOLVER, '{rover_file}', '-o', '{output_file}', '-s', '{strategy}'],
+        strategy_args={'PPK': ['-b', '{base_file}']},
+        dynamics_args={'static': ['--static']}, **kwargs)
+
+# ------------------------------------------------------------------------------
+
+def test_local__build_command_drops_undefined_fields():
+
+    engine = local.SubprocessProcessingEngine(['solver', '{rover_file}', '{base_file}'],
+                                              strategy_args={'PPK': ['-b', '{base_file}']})
+
+    cmd = engine.build_command({'rover_file': 'rover.obs', 'strategy': 'SPP', 'rover_dynamics': 'static'})
+    assert cmd == ['solver', 'rover.obs']
+
+    cmd = engine.build_command({'rover_file': 'rover.obs', 'base_file': 'base.obs', 
+                                'strategy': 'PPK', 'rover_dynamics': 'static'})
+    assert cmd == ['solver', 'rover.obs', 'base.obs', '-b', 'base.obs']
+
+# ------------------------------------------------------------------------------
+
+def test_local__run_stub_solver(tmpdir):
+
+    rover_file = os.path.join(str(tmpdir), 'rover.obs')
+    with open(rover_file, 'w') as fh:
+        fh.write('rover')
+
+    engine = _make_engine(max_workers=2)
+
+    out = engine.run(rover_file, 'PPK', 'static', base_file=rover_file)
+    assert isinstance(out, jason.ProcessingSolutions)
+    assert len(out) == 2
+    assert [p.altitude_m for p in out] == [100.0, 100.0]
+
+    out = engine.run(rover_file, 'SPP', 'dynamic')
+    assert [p.altitude_m for p in out] == [200.0, 200.0]
+
+    assert engine.version()[jason.ENGINE_NAME_STR] == 'local'
+
+# ------------------------------------------------------------------------------
+
+def test_local__run_failure(tmpdir):
+
+    engine = _make_engine()
+
+    out = engine.run(os.path.join(str(tmpdir), 'missing.obs'), 'SPP', 'static')
+    assert out is None
+
+# ------------------------------------------------------------------------------
+
+def test_local__missing_solver(tmpdir):
+
+    missing_solver = os.path.join(str(tmpdir), 'missing_solver')
+    engine = local.SubprocessProcessingEngine([missing_solver, '{rover_file}'], version_command=[missing_solver])
+
+    assert engine.run(os.path.join(str(tmpdir), 'rover.obs'), 'SPP', 'static') is None
+    assert engine.version()['version'] == 'unknown'
+
+# ------------------------------------------------------------------------------
+
+def test_local__version_timeout():
+
+    engine = local.SubprocessProcessingEngine([sys.executable], timeout=0.5,
+                                              version_command=[sys.executable, '-c', 'import time; time.sleep(10)'])
+
+    assert engine.version()['version'] == 'unknown'
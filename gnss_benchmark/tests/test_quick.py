@@ -0,0 +1,130 @@
+import datetime
+import os.path
+
+import roktools.time
+
+import gnss_benchmark.jason as jason
+import gnss_benchmark.quick as quick
+
+PATH = os.path.dirname(os.path.realpath(__file__))
+DATASETS_PATH = os.path.join(PATH, '../datasets')
+
+# ------------------------------------------------------------------------------
+
+def _read_epochs(filename):
+
+    version = quick.get_rinex_version(filename)
+    with open(filename, 'r') as fh:
+        _, n_obs = quick._read_header(fh)
+        return [epoch for epoch, _ in quick._read_blocks(fh, version, n_obs)]
+
+# ------------------------------------------------------------------------------
+
+def test_quick__trim_rinex3(tmpdir):
+
+    rinex_file = os.path.join(DATASETS_PATH, 'argonaut_single_static_3m_10Hz/argonaut_2.rnx')
+
+    assert quick.get_rinex_version(rinex_file) == 3.03
+
+    first_epoch = quick.get_first_epoch(rinex_file)
+    assert first_epoch == datetime.datetime(2020, 9, 15, 11, 4, 32, 693000)
+
+    start = first_epoch + datetime.timedelta(seconds=10)
+    end = start + datetime.timedelta(seconds=60)
+    trimmed_file = quick.trim_rinex_file(rinex_file, start, end, 5.0, cache_folder=str(tmpdir))
+
+    epochs = _read_epochs(trimmed_file)
+    assert len(epochs) == 12
+    assert start <= epochs[0] and epochs[-1] <= end
+
+    # Epochs closest to the 5 second grid of GPS time (data is at 10Hz)
+    for epoch in epochs:
+        gps_seconds = (epoch - jason.GPS_EPOCH).total_seconds()
+        assert abs(gps_seconds - round(gps_seconds / 5.0) * 5.0) < 0.05
+
+    assert quick.trim_rinex_file(rinex_file, start, end, 5.0, cache_folder=str(tmpdir)) == trimmed_file
+
+# ------------------------------------------------------------------------------
+
+def test_quick__trim_rinex2(tmpdir):
+
+    rinex_file = os.path.join(DATASETS_PATH, 'geodetic_single_static/mhdl100t.20o_l1')
+
+    first_epoch = quick.get_first_epoch(rinex_file)
+    assert first_epoch == datetime.datetime(2020, 4, 9, 20, 0, 0)
+
+    end = first_epoch + datetime.timedelta(seconds=120)
+    trimmed_file = quick.trim_rinex_file(rinex_file, first_epoch, end, 30.0, cache_folder=str(tmpdir))
+
+    epochs = _read_epochs(trimmed_file)
+    assert [(epoch - first_epoch).total_seconds() for epoch in epochs] == [0, 30, 60, 90, 120]
+
+    with open(trimmed_file, 'r') as fh:
+        assert '30.000' in [line[:10].strip() for line in fh if 'INTERVAL' in line]
+
+# ------------------------------------------------------------------------------
+
+def test_quick__trim_rover_and_base_aligned(tmpdir):
+
+    rover_file = os.path.join(DATASETS_PATH, 'geodetic_single_static/mhdl100t.20o_l1')
+
+    # Base file that starts 3 seconds after the rover
+    base_file = str(tmpdir.join('base.20o'))
+    with open(rover_file, 'r') as fh_in, open(base_file, 'w') as fh_out:
+        header, n_obs = quick._read_header(fh_in)
+        fh_out.writelines(header)
+        for i, (_, block) in enumerate(quick._read_blocks(fh_in, 2.11, n_obs)):
+            if i >= 3:
+                fh_out.writelines(block)
+
+    inputs = {'rover_file': rover_file, 'base_file': base_file}
+    profile = quick.QuickProfile(duration=60, interval=5, cache_folder=str(tmpdir.join('cache')))
+    trimmed_inputs, window = quick.trim_inputs(inputs, profile)
+
+    rover_epochs = _read_epochs(trimmed_inputs['rover_file'])
+    base_epochs = _read_epochs(trimmed_inputs['base_file'])
+
+    assert [e.second for e in rover_epochs] == [0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 0]
+    assert base_epochs == rover_epochs[1:]
+
+# ------------------------------------------------------------------------------
+
+def test_quick__non_rinex_file_is_not_trimmed(tmpdir):
+
+    filename = os.path.join(DATASETS_PATH, 'smartphone_single_static/quicksurv_2020_05_19_20_19_15.txt')
+
+    assert quick.get_first_epoch(filename) is None
+    inputs = {'rover_file': filename}
+    assert quick.trim_inputs(inputs, quick.QuickProfile(cache_folder=str(tmpdir))) == (inputs, None)
+
+# ------------------------------------------------------------------------------
+
+def test_quick__trim_inputs(tmpdir):
+
+    rover_file = os.path.join(DATASETS_PATH, 'geodetic_single_static/mhdl100t.20o_l1')
+    inputs = {'rover_file': rover_file, 'base_lonlathgt': [0, 0, 0]}
+
+    trimmed_inputs, window = quick.trim_inputs(inputs, quick.QuickProfile(duration=60, cache_folder=str(tmpdir)))
+
+    assert window == (datetime.datetime(2020, 4, 9, 20, 0, 0), datetime.datetime(2020, 4, 9, 20, 1, 0))
+    assert inputs['rover_file'] == rover_file
+    assert trimmed_inputs['rover_file'] != rover_file
+    assert os.path.basename(trimmed_inputs['rover_file']) == os.path.basename(rover_file)
+    assert trimmed_inputs['base_lonlathgt'] == [0, 0, 0]
+
+# ------------------------------------------------------------------------------
+
+def test_quick__trim_solutions():
+
+    csv_file = os.path.join(DATASETS_PATH, 'mosaicx5_multi_dynamic/reference_trajectory.csv')
+    solutions = jason.convert_csv_output_to_processing_solutions(csv_file)
+
+    start = roktools.time.weektow_to_datetime(46600, 2134)
+    end = roktools.time.weektow_to_datetime(46700, 2134)
+
+    trimmed = quick.trim_solutions(solutions, start, end)
+
+    margin = datetime.timedelta(seconds=quick.REFERENCE_MARGIN_S)
+    assert 0 < len(trimmed) < len(solutions)
+    assert all([start - margin <= p.epoch <= end + margin for p in trimmed])
+    assert len(trimmed) == len([p for p in solutions if start - margin <= p.epoch <= end + margin])
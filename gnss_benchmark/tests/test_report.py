@@ -1,11 +1,17 @@
 import datetime
+import json
 import os.path
+import shutil
 import numpy as np
 
 import roktools.time
 
 import gnss_benchmark.report as report
 import gnss_benchmark.jason as jason
+import gnss_benchmark.journal as journal
+import gnss_benchmark.quick as quick
+
+from helpers import ReferenceEngine
 
 def test_report__reference_trajectory_zero():
 
@@ -44,4 +50,131 @@ def test_report__compute_enu_differences_from_jason_zip():
     rms_h, rms_u = report.compute_horiz_and_vertical_rms(enus)
 
     assert rms_h != report.INVALID_RMS_VALUE
-    assert rms_u != report.INVALID_RMS_VALUE
\ No newline at end of file
+    assert rms_u != report.INVALID_RMS_VALUE
+
+def test_report__make_with_several_engines(tmpdir):
+
+    engines = {'engine_a': ReferenceEngine('a'), 'engine_b': ReferenceEngine('b')}
+
+    report_filename = report.make(engines, output_folder=str(tmpdir), report_name='report.md', 
+                                  tests=['mosaicx5_multi_dynamic'], durations_file=None)
+
+    with open(report_filename, 'r') as fh:
+        doc = fh.read()
+
+    assert 'Horizontal error [m] (engine_a)' in doc
+    assert 'Horizontal error [m] (engine_b)' in doc
+    assert '|PPK|dynamic|0.000|0.000|0.000|0.000|' in doc
+    assert os.path.isfile(os.path.join(str(tmpdir), 'figures', 'mosaicx5_multi_dynamic_ppk.png'))
+
+
+class FailingEngine(ReferenceEngine):
+
+    def __init__(self, name, failing_strategy):
+        super().__init__(name)
+        self.failing_strategy = failing_strategy
+
+    def run(self, rover_file, strategy, rover_dynamics, **kwargs):
+        if strategy == self.failing_strategy:
+            self.runs.append((strategy, rover_dynamics))
+            return None
+        return super().run(rover_file, strategy, rover_dynamics, **kwargs)
+
+
+def test_report__resume_run(tmpdir):
+
+    run_folder = str(tmpdir.join('run'))
+    durations_file = str(tmpdir.join('durations.json'))
+
+    engine = FailingEngine('a', 'PPP')
+    report.make(engine, output_folder=str(tmpdir), report_name='report.md', tests=['mosaicx5_multi_dynamic'],
+                run_folder=run_folder, durations_file=durations_file)
+    assert sorted(engine.runs) == [('PPK', 'dynamic'), ('PPP', 'dynamic'), ('SPP', 'dynamic')]
+
+    engine.failing_strategy = None
+    engine.runs = []
+    report_filename = report.make(engine, output_folder=str(tmpdir), report_name='report.md', 
+                                  tests=['mosaicx5_multi_dynamic'], run_folder=run_folder, 
+                                  durations_file=durations_file)
+    assert engine.runs == [('PPP', 'dynamic')]
+
+    with open(report_filename, 'r') as fh:
+        doc = fh.read()
+
+    assert '|SPP|dynamic|0.000|0.000|' in doc
+    assert '|PPP|dynamic|0.000|0.000|' in doc
+
+
+def test_report__longest_configurations_first(tmpdir):
+
+    durations_file = str(tmpdir.join('durations.json'))
+
+    engine = ReferenceEngine('a')
+
+    durations = journal.DurationHistory(durations_file)
+    for i_conf, strategy, duration in [(0, 'SPP', 1.0), (1, 'PPK', 5.0), (2, 'PPP', 20.0)]:
+        configuration = {'strategy': strategy, 'rover_dynamics': 'dynamic'}
+        key = journal.get_key('engine', 'mosaicx5_multi_dynamic', i_conf, configuration, engine=engine)
+        durations.update(key, duration)
+
+    report.make(engine, output_folder=str(tmpdir), report_name='report.md', tests=['mosaicx5_multi_dynamic'],
+                durations_file=durations_file)
+
+    assert engine.runs == [('PPP', 'dynamic'), ('PPK', 'dynamic'), ('SPP', 'dynamic')]
+
+
+def test_report__quick_window_outside_reference(tmpdir):
+
+    datasets_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), '../datasets')
+
+    # Rover file recorded at another time than the reference trajectory
+    test_path = tmpdir.join('datasets', 'mosaicx5_multi_dynamic')
+    test_path.ensure(dir=True)
+    shutil.copy(os.path.join(datasets_path, 'mosaicx5_multi_dynamic/reference_trajectory.csv'), str(test_path))
+    shutil.copy(os.path.join(datasets_path, 'argonaut_single_static_3m_10Hz/argonaut_2.rnx'), str(test_path))
+
+    with open(os.path.join(datasets_path, 'mosaicx5_multi_dynamic/description.json'), 'r') as fh:
+        description = json.load(fh)
+    description['inputs'] = {'rover_file': 'argonaut_2.rnx'}
+    test_path.join('description.json').write(json.dumps(description))
+
+    quick_profile = quick.QuickProfile(duration=60, cache_folder=str(tmpdir.join('cache')))
+
+    references = report._get_references(description, str(test_path), 
+                                        window=quick.trim_inputs({'rover_file': str(test_path.join('argonaut_2.rnx'))},
+                                                                 quick_profile)[1])
+    assert references == {'SPP': None, 'PPK': None, 'PPP': None}
+
+    engine = ReferenceEngine('a', trajectory_file=str(test_path.join('reference_trajectory.csv')))
+    report_filename = report.make(engine, description_files_root_path=str(tmpdir.join('datasets')),
+                                  output_folder=str(tmpdir), report_name='report.md', quick_profile=quick_profile,
+                                  durations_file=None)
+    assert os.path.isfile(report_filename)
+
+
+def test_report__pattern_with_loaded_descriptions(monkeypatch):
+
+    rendered = []
+    monkeypatch.setattr(report, '_render_report', lambda descriptions, *args: rendered.append(sorted(descriptions)))
+
+    descriptions = report.get_test_descriptions()
+
+    # Patterns are matched against the path of the description file in both cases
+    for pattern in ['mosaicx5', 'description.json', 'datasets/mosaicx5']:
+        report.make(ReferenceEngine('a'), pattern=pattern, results={'engine': {}}, descriptions=descriptions)
+        assert rendered[-1] == sorted(report.get_test_descriptions(pattern=pattern))
+        assert rendered[-1]
+
+
+def test_report__references_cache_is_bounded():
+
+    cache = report.ReferencesCache(max_size=2)
+
+    assert cache.get('a', lambda: 1) == 1
+    assert cache.get('b', lambda: 2) == 2
+    assert cache.get('a', lambda: None) == 1
+    assert cache.get('c', lambda: 3) == 3
+
+    assert len(cache) == 2
+    assert cache.get('b', lambda: 4) == 4
+    assert cache.get('a', lambda: None) is None
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import gnss_benchmark.service as service
+
+from helpers import ReferenceEngine
+
+# ------------------------------------------------------------------------------
+
+@pytest.fixture
+def server(tmpdir):
+
+    ReferenceEngine.instances = 0
+
+    benchmark_service = service.BenchmarkService(ReferenceEngine, output_folder=str(tmpdir), workers=2,
+                                                 durations_file=str(tmpdir.join('durations.json')))
+    benchmark_service.start()
+
+    http_server = service.make_server(benchmark_service, port=0)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+
+    yield 'http://127.0.0.1:{}'.format(http_server.server_address[1])
+
+    http_server.shutdown()
+    http_server.server_close()
+
+# ------------------------------------------------------------------------------
+
+def _request(url, body=None):
+
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    with urllib.request.urlopen(urllib.request.Request(url, data=data)) as r:
+        return r.status, r.read()
+
+# ------------------------------------------------------------------------------
+
+def test_service__run_jobs(server):
+
+    status, body = _request(server + '/tests')
+    assert 'mosaicx5_multi_dynamic' in json.loads(body)
+
+    parameters = {'tests': ['mosaicx5_multi_dynamic'], 'report_name': 'report.md'}
+    job_ids = []
+    for _ in range(3):
+        status, body = _request(server + '/jobs', parameters)
+        assert status == 202
+        job_ids.append(json.loads(body)['id'])
+
+    for job_id in job_ids:
+        for _ in range(300):
+            job = json.loads(_request(server + f'/jobs/{job_id}')[1])
+            if job['status'] in (service.FINISHED, service.FAILED):
+                break
+            time.sleep(0.1)
+
+        assert job['status'] == service.FINISHED
+
+        status, body = _request(server + job['report'])
+        assert b'|PPK|dynamic|0.000|0.000|' in body
+
+    assert ReferenceEngine.instances == 2
+
+    metrics = json.loads(_request(server + '/metrics')[1])
+    assert metrics['queue_depth'] == 0
+    assert metrics['finished'] == 3
+    assert metrics['failed'] == 0
+    assert metrics['latency_s']['max'] >= metrics['latency_s']['p50'] > 0
+
+# ------------------------------------------------------------------------------
+
+def test_service__invalid_job(server):
+
+    with pytest.raises(urllib.error.HTTPError) as e:
+        _request(server + '/jobs', {'tests': ['unknown_test']})
+    assert e.value.code == 400
+
+    with pytest.raises(urllib.error.HTTPError) as e:
+        _request(server + '/jobs/unknown_id')
+    assert e.value.code == 404
+
+# ------------------------------------------------------------------------------
+
+def test_service__forget_oldest_finished_jobs(tmpdir):
+
+    benchmark_service = service.BenchmarkService(ReferenceEngine, output_folder=str(tmpdir), workers=1,
+                                                 durations_file=None, max_finished_jobs=2)
+    benchmark_service.start()
+
+    parameters = {'tests': ['mosaicx5_multi_dynamic'], 'report_name': 'report.md'}
+    jobs = [benchmark_service.submit(parameters) for _ in range(3)]
+
+    benchmark_service.queue.join()
+
+    assert benchmark_service.get_job(jobs[0].id) is None
+    assert [job.id for job in benchmark_service.get_jobs()] == [job.id for job in jobs[1:]]
+
+    assert benchmark_service.metrics()['finished'] == 3
+    assert len(benchmark_service.references_cache) == 1
+
+# ------------------------------------------------------------------------------
+
+def test_service__quick_profile_validation(tmpdir):
+
+    benchmark_service = service.BenchmarkService(ReferenceEngine, output_folder=str(tmpdir), durations_file=None)
+
+    job = benchmark_service.submit({'quick': {'start': 0, 'duration': '300', 'interval': None}})
+    assert job.parameters['quick'] == {'start': 0.0, 'duration': 300.0, 'interval': None}
+
+    for quick_profile in [{'duration': 'abc'}, {'duration': float('nan')}, {'cache_folder': str(tmpdir)}, 300]:
+        with pytest.raises(ValueError):
+            benchmark_service.submit({'quick': quick_profile})
@@ -0,0 +1,107 @@
+import os.path
+import shutil
+
+import numpy as np
+
+import roktools.time
+
+import gnss_benchmark.jason as jason
+import gnss_benchmark.quick as quick
+import gnss_benchmark.trajectory as trajectory
+
+PATH = os.path.dirname(os.path.realpath(__file__))
+CSV_FILE = os.path.join(PATH, '../datasets/mosaicx5_multi_dynamic/reference_trajectory.csv')
+
+# ------------------------------------------------------------------------------
+
+def test_trajectory__compile_and_load(tmpdir):
+
+    csv_file = os.path.join(str(tmpdir), 'reference_trajectory.csv')
+    shutil.copy(CSV_FILE, csv_file)
+
+    reference = trajectory.load_trajectory(csv_file)
+    assert not isinstance(reference, jason.ArrayProcessingSolutions)
+
+    sidecar_file = trajectory.compile_trajectory(csv_file)
+    assert os.path.isfile(sidecar_file)
+
+    compiled = trajectory.load_trajectory(csv_file)
+    assert isinstance(compiled, jason.ArrayProcessingSolutions)
+    assert isinstance(compiled.data, np.memmap)
+    assert len(compiled) == len(reference) == 1158
+
+    epoch = roktools.time.weektow_to_datetime(46551.5, 2134)
+    expected = reference.interpolate(epoch)
+    solution = compiled.interpolate(epoch)
+    assert solution.epoch == expected.epoch
+    assert round(solution.latitude_deg - expected.latitude_deg, 9) == 0
+    assert round(solution.longitude_deg - expected.longitude_deg, 9) == 0
+    assert round(solution.altitude_m - expected.altitude_m, 6) == 0
+
+    assert [p.epoch for p in compiled] == [p.epoch for p in reference]
+
+# ------------------------------------------------------------------------------
+
+def test_trajectory__outdated_sidecar_is_not_used(tmpdir):
+
+    csv_file = os.path.join(str(tmpdir), 'reference_trajectory.csv')
+    shutil.copy(CSV_FILE, csv_file)
+
+    old_sidecar_file = trajectory.compile_trajectory(csv_file)
+
+    with open(csv_file, 'a') as fh:
+        fh.write('2134,50000.000000,41.6423503240,2.3593755210,258.85330,0.0541,0.0445,0.1128\n')
+
+    assert len(trajectory.load_trajectory(csv_file)) == 1159
+
+    sidecar_file = trajectory.compile_trajectory(csv_file)
+    assert sidecar_file != old_sidecar_file
+    assert not os.path.isfile(old_sidecar_file)
+    assert len(trajectory.load_trajectory(csv_file)) == 1159
+
+# ------------------------------------------------------------------------------
+
+def test_trajectory__load_does_not_hash_unmodified_file(tmpdir, monkeypatch):
+
+    csv_file = os.path.join(str(tmpdir), 'reference_trajectory.csv')
+    shutil.copy(CSV_FILE, csv_file)
+
+    trajectory.compile_trajectory(csv_file)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Checksum should not be computed')
+
+    monkeypatch.setattr(jason, 'compute_file_hash', fail)
+
+    assert isinstance(trajectory.load_trajectory(csv_file), jason.ArrayProcessingSolutions)
+
+    monkeypatch.undo()
+
+    # Touched file with the same contents: checksum is computed once
+    stat = os.stat(csv_file)
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    assert isinstance(trajectory.load_trajectory(csv_file), jason.ArrayProcessingSolutions)
+
+    monkeypatch.setattr(jason, 'compute_file_hash', fail)
+    assert isinstance(trajectory.load_trajectory(csv_file), jason.ArrayProcessingSolutions)
+
+# ------------------------------------------------------------------------------
+
+def test_trajectory__trim_outside_compiled_trajectory(tmpdir):
+
+    csv_file = os.path.join(str(tmpdir), 'reference_trajectory.csv')
+    shutil.copy(CSV_FILE, csv_file)
+
+    trajectory.compile_trajectory(csv_file)
+    reference = trajectory.load_trajectory(csv_file)
+
+    # Window a week after the trajectory
+    start = roktools.time.weektow_to_datetime(46600, 2135)
+    end = roktools.time.weektow_to_datetime(46700, 2135)
+
+    trimmed = quick.trim_solutions(reference, start, end)
+    assert isinstance(trimmed, jason.ArrayProcessingSolutions)
+    assert len(trimmed) == 0
+    assert list(trimmed) == []
+
+    assert len(quick.trim_solutions(trimmed, start, end)) == 0
@@ -0,0 +1,194 @@
+"""
+Binary sidecars of reference trajectories
+
+Parsing large reference trajectories (CSV files) is slow, so they can be
+compiled into a binary sidecar (numpy .npy file with a structured array)
+placed next to the CSV file. The name of the sidecar includes the format
+version and the checksum of the CSV contents, so that sidecars of outdated
+CSV files are never used. Sidecars are loaded as memory maps, so that they are
+read lazily and shared (through the page cache) among parallel workers.
+
+A small manifest, written along with the sidecar, keeps the size,
+modification time and checksum of the CSV file, so that loading a trajectory
+only needs to compute the checksum of the CSV file if it has been modified
+"""
+import glob
+import json
+import os
+
+import numpy as np
+
+from roktools import logger
+
+from . import jason
+
+SIDECAR_VERSION = 1
+
+SIDECAR_EXTENSION = '.npy'
+
+MANIFEST_EXTENSION = '.json'
+
+# Columns of the CSV file stored in the sidecar
+COLUMNS = ['GPSW', 'GPSSoW', 'longitudedeg', 'latitudedeg', 'heightm']
+
+CHECKSUM_LENGTH = 16
+
+
+# ------------------------------------------------------------------------------
+
+def get_sidecar_filename(csv_file: str, checksum: str = None) -> str:
+    """
+    Name of the sidecar of the given (CSV) trajectory file
+    """
+
+    if checksum is None:
+        checksum = jason.compute_file_hash(csv_file)
+
+    return f'{csv_file}.v{SIDECAR_VERSION}.{checksum[:CHECKSUM_LENGTH]}{SIDECAR_EXTENSION}'
+
+# ------------------------------------------------------------------------------
+
+def get_manifest_filename(csv_file: str) -> str:
+
+    return f'{csv_file}.v{SIDECAR_VERSION}{MANIFEST_EXTENSION}'
+
+# ------------------------------------------------------------------------------
+
+def compile_trajectory(csv_file: str) -> str:
+    """
+    Write the binary sidecar of a trajectory file (if not already present),
+    removing the sidecars of previous versions of the file
+
+    :returns: the name of the sidecar file
+    """
+
+    checksum = jason.compute_file_hash(csv_file)
+    sidecar_file = get_sidecar_filename(csv_file, checksum)
+
+    for old_sidecar_file in glob.glob(glob.escape(csv_file) + '.v*' + SIDECAR_EXTENSION):
+        if old_sidecar_file != sidecar_file:
+            logger.debug(f'Removing outdated sidecar [ {old_sidecar_file} ]')
+            os.remove(old_sidecar_file)
+
+    if os.path.isfile(sidecar_file):
+        _write_manifest(csv_file, checksum, sidecar_file)
+        return sidecar_file
+
+    logger.info(f'Compiling trajectory [ {csv_file} ] into [ {sidecar_file} ]')
+
+    data = np.genfromtxt(csv_file, names=True, delimiter=",")
+    data = np.atleast_1d(data)
+
+    out = np.empty(len(data), dtype=[(column, np.float64) for column in COLUMNS])
+    for column in COLUMNS:
+        out[column] = data[column]
+
+    tmp_file = sidecar_file + '.tmp'
+    with open(tmp_file, 'wb') as fh:
+        np.save(fh, out)
+    os.replace(tmp_file, sidecar_file)
+
+    _write_manifest(csv_file, checksum, sidecar_file)
+
+    return sidecar_file
+
+# ------------------------------------------------------------------------------
+
+def load_trajectory(csv_file: str) -> jason.ProcessingSolutions:
+    """
+    Load a trajectory file, using its binary sidecar (memory mapped) if 
+    available and up to date, or parsing the CSV file otherwise
+    """
+
+    sidecar_file = _get_up_to_date_sidecar(csv_file)
+
+    if sidecar_file:
+        logger.debug(f'Loading trajectory from sidecar [ {sidecar_file} ]')
+        data = np.load(sidecar_file, mmap_mode='r')
+        return jason.ArrayProcessingSolutions(data)
+
+    logger.debug(f'No up to date sidecar found for [ {csv_file} ], parsing CSV file')
+    return jason.convert_csv_output_to_processing_solutions(csv_file)
+
+# ------------------------------------------------------------------------------
+
+def _get_up_to_date_sidecar(csv_file: str) -> str:
+    """
+    Get the sidecar of a trajectory file if it matches the current contents
+    of the file. The checksum of the file is only computed if its size or
+    modification time differ from the ones recorded in the manifest
+    """
+
+    manifest_file = get_manifest_filename(csv_file)
+
+    try:
+        with open(manifest_file, 'r') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+    sidecar_file = os.path.join(os.path.dirname(csv_file), manifest['sidecar'])
+    if not os.path.isfile(sidecar_file):
+        return None
+
+    stat = os.stat(csv_file)
+    if stat.st_size == manifest['size'] and stat.st_mtime_ns == manifest['mtime_ns']:
+        return sidecar_file
+
+    if stat.st_size != manifest['size'] or jason.compute_file_hash(csv_file) != manifest['sha256']:
+        return None
+
+    # Contents have not changed (e.g. the file has been touched or copied)
+    try:
+        _write_manifest(csv_file, manifest['sha256'], sidecar_file)
+    except OSError:
+        pass
+
+    return sidecar_file
+
+# ------------------------------------------------------------------------------
+
+def _write_manifest(csv_file: str, checksum: str, sidecar_file: str):
+
+    stat = os.stat(csv_file)
+
+    manifest = {
+        'version': SIDECAR_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': checksum,
+        'sidecar': os.path.basename(sidecar_file)
+    }
+
+    manifest_file = get_manifest_filename(csv_file)
+    tmp_file = manifest_file + '.tmp'
+    with open(tmp_file, 'w') as fh:
+        json.dump(manifest, fh, indent=4)
+    os.replace(tmp_file, manifest_file)
+
+# ------------------------------------------------------------------------------
+
+def compile_trajectories(descriptions: dict, description_files_root_path: str) -> list:
+    """
+    Compile the reference trajectories of the given test descriptions
+
+    :returns: the list of sidecar files
+    """
+
+    sidecar_files = []
+
+    for test_short_name, description in descriptions.items():
+
+        validation = description.get('validation', {})
+        trajectory_files = set(validation.get('reference_trajectory', {}).values())
+
+        for trajectory_file in sorted(trajectory_files):
+            csv_file = os.path.join(description_files_root_path, test_short_name, trajectory_file)
+
+            if not os.path.isfile(csv_file):
+                logger.warning(f'Reference trajectory [ {csv_file} ] of {test_short_name} not found')
+                continue
+
+            sidecar_files.append(compile_trajectory(csv_file))
+
+    return sidecar_files